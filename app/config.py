@@ -12,3 +12,19 @@ GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/ap
 
 # 憑證檔案路徑
 GMAIL_TOKEN_PATH = os.getenv("GMAIL_TOKEN_PATH", "credentials/token.json")
+
+# 資料匯入設定
+IMPORT_DATA_DIR = os.getenv("IMPORT_DATA_DIR", "my_data")
+IMPORT_UPLOAD_DIR = os.getenv("IMPORT_UPLOAD_DIR", "uploads/imports")
+IMPORT_MAX_UPLOAD_BYTES = int(os.getenv("IMPORT_MAX_UPLOAD_BYTES", str(1024 * 1024 * 1024)))
+
+# 郵件發送設定
+# Gmail messages.send 每次耗用 100 配額單位，每位使用者每秒上限 250 單位，約每秒 2.5 封
+EMAIL_SEND_WORKERS = int(os.getenv("EMAIL_SEND_WORKERS", "4"))
+EMAIL_SEND_RATE = float(os.getenv("EMAIL_SEND_RATE", "2.5"))
+EMAIL_SEND_BURST = int(os.getenv("EMAIL_SEND_BURST", "10"))
+# 每個 Gmail HTTP batch 的郵件數（上限 100；Google 建議寄信不超過 50 以免觸發限流）
+EMAIL_SEND_BATCH_SIZE = int(os.getenv("EMAIL_SEND_BATCH_SIZE", "50"))
+# 發送結果累積到這麼多筆或這麼多秒就寫回資料庫（程序中斷時，未寫回的結果會被記為失敗）
+EMAIL_LOG_FLUSH_ROWS = int(os.getenv("EMAIL_LOG_FLUSH_ROWS", "500"))
+EMAIL_LOG_FLUSH_SECONDS = float(os.getenv("EMAIL_LOG_FLUSH_SECONDS", "10"))
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import DATABASE_URL
 
@@ -6,6 +7,13 @@ engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Indexes replaced by ones under a new name; init_db drops them
+SUPERSEDED_INDEXES = [
+    # varchar_pattern_ops prefix indexes, which cannot serve ORDER BY; now COLLATE "C"
+    "ix_customers_name_lower_prefix",
+    "ix_customers_email_lower_prefix",
+]
+
 
 def get_db():
     db = SessionLocal()
@@ -13,3 +21,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def init_db():
+    """Create missing tables, plus indexes added to tables that already exist."""
+    if engine.dialect.name == "postgresql":
+        # Trigram indexes for customer search
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for name in SUPERSEDED_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    Base.metadata.create_all(bind=engine)
+    failed = []
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except IntegrityError:
+                # Rows imported before the unique index existed may be duplicated
+                failed.append(index.name)
+    if failed:
+        # Imports rely on these indexes for ON CONFLICT, so refuse to start without them
+        raise RuntimeError(
+            f"Cannot create unique indexes {', '.join(failed)} because of duplicate rows; "
+            "run scripts/dedupe_imports.py to remove them"
+        )
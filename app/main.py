@@ -2,12 +2,18 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from app.database import engine, Base
-from app.routers import customers_router, events_router, analytics_router, email_router
+from app.database import SessionLocal, init_db
+from app.routers import customers_router, events_router, analytics_router, email_router, imports_router
+from app.services.customer_stats import CustomerStatsService
 from app.services.scheduler_service import scheduler_service
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables and indexes
+init_db()
+
+# Backfill the customer activity summary on first run
+with SessionLocal() as db:
+    if CustomerStatsService(db).ensure_built():
+        db.commit()
 
 
 @asynccontextmanager
@@ -31,6 +37,7 @@ app.include_router(customers_router)
 app.include_router(events_router)
 app.include_router(analytics_router)
 app.include_router(email_router)
+app.include_router(imports_router)
 
 # Serve static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
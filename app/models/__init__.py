@@ -1,13 +1,17 @@
 from app.models.customer import Customer
+from app.models.customer_stats import CustomerStats
 from app.models.event import Event
 from app.models.event_registration import EventRegistration
 from app.models.product import Product
 from app.models.purchase import Purchase
 from app.models.email_campaign import EmailCampaign, CampaignStatus, RecipientFilter
 from app.models.email_log import EmailLog, EmailStatus
+from app.models.email_outbox import EmailOutbox, OutboxStatus
+from app.models.data_generation import DataGeneration
+from app.models.import_manifest import ImportManifest
 
 __all__ = [
-    "Customer", "Event", "EventRegistration", "Product", "Purchase",
+    "Customer", "CustomerStats", "Event", "EventRegistration", "Product", "Purchase",
     "EmailCampaign", "CampaignStatus", "RecipientFilter",
-    "EmailLog", "EmailStatus"
+    "EmailLog", "EmailStatus", "EmailOutbox", "OutboxStatus", "DataGeneration", "ImportManifest"
 ]
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -8,6 +8,10 @@ from app.database import Base
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        # Keyset pagination order
+        Index("ix_customers_created_at_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String(255), unique=True, nullable=False, index=True)
@@ -21,3 +25,23 @@ class Customer(Base):
 
     event_registrations = relationship("EventRegistration", back_populates="customer")
     purchases = relationship("Purchase", back_populates="customer")
+    stats = relationship("CustomerStats", back_populates="customer", uselist=False)
+
+
+# Search indexes (Postgres only): trigram GIN for substring search, and
+# btree on lower() for prefix typeahead. The C collation lets one index serve
+# both the LIKE 'prefix%' range and ORDER BY under any database collation.
+Index(
+    "ix_customers_name_trgm", Customer.name,
+    postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_customers_email_trgm", Customer.email,
+    postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_customers_name_lower_c", func.lower(Customer.name).collate("C"),
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_customers_email_lower_c", func.lower(Customer.email).collate("C"),
+).ddl_if(dialect="postgresql")
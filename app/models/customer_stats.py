@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Numeric, DateTime, Boolean, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class CustomerStats(Base):
+    """Per-customer activity summary, maintained by CustomerStatsService."""
+    __tablename__ = "customer_stats"
+    __table_args__ = (
+        # Segment lookups: purchasers, non-purchasers and event attendees
+        Index(
+            "ix_customer_stats_purchased", "customer_id",
+            postgresql_where=text("has_purchased"), sqlite_where=text("has_purchased"),
+        ),
+        Index(
+            "ix_customer_stats_not_purchased", "customer_id",
+            postgresql_where=text("NOT has_purchased"), sqlite_where=text("NOT has_purchased"),
+        ),
+        Index(
+            "ix_customer_stats_attended", "customer_id",
+            postgresql_where=text("has_attended"), sqlite_where=text("has_attended"),
+        ),
+    )
+
+    customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    purchase_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Numeric(12, 2), nullable=False, default=0)
+    first_activity_at = Column(DateTime)
+    last_activity_at = Column(DateTime)
+    has_purchased = Column(Boolean, nullable=False, default=False)
+    has_attended = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    customer = relationship("Customer", back_populates="stats")
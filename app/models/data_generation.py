@@ -0,0 +1,12 @@
+from datetime import datetime
+from sqlalchemy import Column, String, BigInteger, DateTime
+from app.database import Base
+
+
+class DataGeneration(Base):
+    """Counter bumped by every write path so caches can detect stale results."""
+    __tablename__ = "data_generations"
+
+    name = Column(String(50), primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,7 +1,7 @@
 import uuid
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum, Integer
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -15,6 +15,10 @@ class EmailStatus(str, enum.Enum):
 
 class EmailLog(Base):
     __tablename__ = "email_logs"
+    __table_args__ = (
+        # 分頁查詢（keyset pagination）
+        Index("ix_email_logs_campaign_created_id", "campaign_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     campaign_id = Column(UUID(as_uuid=True), ForeignKey("email_campaigns.id"), nullable=False)
@@ -0,0 +1,35 @@
+import enum
+from datetime import datetime
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class EmailOutbox(Base):
+    """活動待發送佇列：每位收件人一列（主鍵保證同一活動不會重複寄給同一人）"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # 認領待發送列
+        Index("ix_email_outbox_campaign_status", "campaign_id", "status"),
+    )
+
+    campaign_id = Column(UUID(as_uuid=True), ForeignKey("email_campaigns.id"), primary_key=True)
+    customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), primary_key=True)
+
+    recipient_email = Column(String(255), nullable=False)
+    recipient_name = Column(String(100))
+
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    error_message = Column(Text)
+
+    # 認領時間（超過租約仍未完成視為程序中斷）
+    claimed_at = Column(DateTime)
+    processed_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
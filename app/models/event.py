@@ -11,7 +11,7 @@ class Event(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
-    event_date = Column(Date)
+    event_date = Column(Date, index=True)
     source = Column(String(50), default="accupass")
     created_at = Column(DateTime, default=datetime.utcnow)
 
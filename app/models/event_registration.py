@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -8,9 +8,15 @@ from app.database import Base
 
 class EventRegistration(Base):
     __tablename__ = "event_registrations"
+    __table_args__ = (
+        # Keyset pagination of an event's registrations
+        Index("ix_event_registrations_event_created_id", "event_id", "created_at", "id"),
+        # One registration per customer per event; target of import upserts
+        Index("uq_event_registrations_event_customer", "event_id", "customer_id", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), nullable=False, index=True)
     event_id = Column(UUID(as_uuid=True), ForeignKey("events.id"), nullable=False)
     order_no = Column(String(50))
     ticket_type = Column(String(100))
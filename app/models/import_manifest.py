@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, String, BigInteger, Integer, DateTime
+from app.database import Base
+
+
+class ImportManifest(Base):
+    """One imported source file, so unchanged files can be skipped next run."""
+    __tablename__ = "import_manifest"
+
+    path = Column(String(1024), primary_key=True)
+    source = Column(String(50), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    mtime_ns = Column(BigInteger, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    rows = Column(Integer, nullable=False, default=0)
+    imported_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
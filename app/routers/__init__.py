@@ -2,5 +2,6 @@ from app.routers.customers import router as customers_router
 from app.routers.events import router as events_router
 from app.routers.analytics import router as analytics_router
 from app.routers.email import router as email_router
+from app.routers.imports import router as imports_router
 
-__all__ = ["customers_router", "events_router", "analytics_router", "email_router"]
+__all__ = ["customers_router", "events_router", "analytics_router", "email_router", "imports_router"]
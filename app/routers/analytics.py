@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.services.analytics import AnalyticsService
-from app.schemas.analytics import OverviewStats, ConversionAnalysis, EventPerformance
+from app.services.analytics import AnalyticsService, analytics_cache
+from app.schemas.analytics import OverviewStats, ConversionAnalysis, EventPerformance, CacheStats
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
@@ -22,7 +24,21 @@ def get_conversion_analysis(db: Session = Depends(get_db)):
 
 
 @router.get("/events/performance", response_model=list[EventPerformance])
-def get_event_performance(db: Session = Depends(get_db)):
-    """Get performance metrics for all events."""
+def get_event_performance(
+    start_date: Optional[date] = Query(None, description="Earliest event_date to include"),
+    end_date: Optional[date] = Query(None, description="Latest event_date to include"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Omit to return all events"),
+    db: Session = Depends(get_db)
+):
+    """Get performance metrics for events, newest first."""
     service = AnalyticsService(db)
-    return service.get_event_performance()
+    return service.get_event_performance(
+        start_date=start_date, end_date=end_date, skip=skip, limit=limit
+    )
+
+
+@router.get("/cache", response_model=CacheStats)
+def get_cache_stats():
+    """Get hit/miss counters for the analytics result cache."""
+    return analytics_cache.stats()
@@ -1,61 +1,67 @@
 from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy import func, or_
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import Customer, EventRegistration, Purchase, Event, Product
-from app.schemas.customer import CustomerResponse, CustomerDetail, EventSummary, PurchaseSummary
+from app.models import Customer, CustomerStats, EventRegistration, Purchase, Event, Product
+from app.schemas.customer import (
+    CustomerResponse, CustomerDetail, CustomerSearchResult, EventSummary, PurchaseSummary
+)
+from app.services.cache import GenerationCache
+from app.services.customer_search import CustomerSearchService
+from app.services.customer_stats import activity_filters
+from app.services.pagination import NEXT_CURSOR_HEADER, apply_keyset, next_cursor
 
 router = APIRouter(prefix="/api/customers", tags=["customers"])
 
+# Filtered customer counts, keyed by (search, has_purchased, has_events)
+customer_count_cache = GenerationCache()
+
 
 @router.get("", response_model=list[CustomerResponse])
 def get_customers(
+    response: Response,
     search: Optional[str] = Query(None, description="Search by name or email"),
     has_purchased: Optional[bool] = Query(None, description="Filter by purchase status"),
     has_events: Optional[bool] = Query(None, description="Filter by event attendance"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor from X-Next-Cursor; replaces skip"),
     db: Session = Depends(get_db)
 ):
-    """Get list of customers with filters."""
-    query = db.query(Customer)
+    """Get list of customers with filters.
+
+    Results are ordered by (created_at, id). When a full page is returned the
+    X-Next-Cursor header holds the cursor for the next page.
+    """
+    # Counts and flags come from the materialized customer_stats row, so the
+    # page is a single query without per-customer aggregation.
+    query = db.query(
+        Customer,
+        func.coalesce(CustomerStats.event_count, 0),
+        func.coalesce(CustomerStats.purchase_count, 0),
+        func.coalesce(CustomerStats.has_purchased, False)
+    ).outerjoin(
+        CustomerStats, CustomerStats.customer_id == Customer.id
+    )
 
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Customer.name.ilike(search_term),
-                Customer.email.ilike(search_term)
-            )
-        )
+        query = query.filter(CustomerSearchService(db).search_filter(search))
 
-    if has_purchased is not None:
-        purchaser_ids = db.query(Purchase.customer_id).distinct()
-        if has_purchased:
-            query = query.filter(Customer.id.in_(purchaser_ids))
-        else:
-            query = query.filter(~Customer.id.in_(purchaser_ids))
+    query = query.filter(*activity_filters(has_purchased, has_events))
 
-    if has_events is not None:
-        attendee_ids = db.query(EventRegistration.customer_id).distinct()
-        if has_events:
-            query = query.filter(Customer.id.in_(attendee_ids))
-        else:
-            query = query.filter(~Customer.id.in_(attendee_ids))
+    try:
+        query = apply_keyset(query, Customer.created_at, Customer.id, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not cursor:
+        query = query.offset(skip)
 
-    customers = query.offset(skip).limit(limit).all()
+    rows = query.limit(limit).all()
 
     results = []
-    for customer in customers:
-        event_count = db.query(func.count(EventRegistration.id)).filter(
-            EventRegistration.customer_id == customer.id
-        ).scalar()
-        purchase_count = db.query(func.count(Purchase.id)).filter(
-            Purchase.customer_id == customer.id
-        ).scalar()
-
+    for customer, event_count, purchase_count, purchased in rows:
         results.append(CustomerResponse(
             id=customer.id,
             email=customer.email,
@@ -68,9 +74,13 @@ def get_customers(
             updated_at=customer.updated_at,
             event_count=event_count,
             purchase_count=purchase_count,
-            has_purchased=purchase_count > 0
+            has_purchased=purchased
         ))
 
+    cursor_value = next_cursor(results, limit, lambda c: c.created_at, lambda c: c.id)
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+
     return results
 
 
@@ -79,35 +89,74 @@ def get_customer_count(
     search: Optional[str] = Query(None),
     has_purchased: Optional[bool] = Query(None),
     has_events: Optional[bool] = Query(None),
+    estimate: bool = Query(False, description="Use planner statistics for the unfiltered total"),
     db: Session = Depends(get_db)
 ):
-    """Get total customer count with filters."""
-    query = db.query(func.count(Customer.id))
+    """Get total customer count with filters.
 
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Customer.name.ilike(search_term),
-                Customer.email.ilike(search_term)
-            )
-        )
+    Exact counts are cached per filter until the next data import.
+    """
+    unfiltered = not search and has_purchased is None and has_events is None
+    if estimate and unfiltered:
+        estimated = _estimate_customer_count(db)
+        if estimated is not None:
+            return {"count": estimated, "estimated": True}
+
+    def count() -> int:
+        query = db.query(func.count(Customer.id))
+
+        if search:
+            query = query.filter(CustomerSearchService(db).search_filter(search))
+
+        if has_purchased is not None or has_events is not None:
+            query = query.outerjoin(
+                CustomerStats, CustomerStats.customer_id == Customer.id
+            ).filter(*activity_filters(has_purchased, has_events))
+
+        return query.scalar()
+
+    key = (search or None, has_purchased, has_events)
+    return {"count": customer_count_cache.get_or_compute(db, key, count), "estimated": False}
 
-    if has_purchased is not None:
-        purchaser_ids = db.query(Purchase.customer_id).distinct()
-        if has_purchased:
-            query = query.filter(Customer.id.in_(purchaser_ids))
-        else:
-            query = query.filter(~Customer.id.in_(purchaser_ids))
-
-    if has_events is not None:
-        attendee_ids = db.query(EventRegistration.customer_id).distinct()
-        if has_events:
-            query = query.filter(Customer.id.in_(attendee_ids))
-        else:
-            query = query.filter(~Customer.id.in_(attendee_ids))
-
-    return {"count": query.scalar()}
+
+def _estimate_customer_count(db: Session) -> Optional[int]:
+    """Row estimate from pg_class; None if unavailable or never analyzed."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'customers'::regclass")
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
+
+
+@router.get("/search", response_model=list[CustomerSearchResult])
+def search_customers(
+    q: str = Query(..., min_length=1, description="Text contained in name or email"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Search customers by name or email, best matches first."""
+    matches = CustomerSearchService(db).search(q, limit)
+    return [
+        CustomerSearchResult(id=c.id, name=c.name, email=c.email, score=float(score))
+        for c, score in matches
+    ]
+
+
+@router.get("/typeahead", response_model=list[CustomerSearchResult])
+def typeahead_customers(
+    q: str = Query(..., min_length=1, description="Prefix of name or email"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Top customers whose name or email starts with the given prefix."""
+    matches = CustomerSearchService(db).typeahead(q, limit)
+    return [
+        CustomerSearchResult(id=c.id, name=c.name, email=c.email, score=float(score))
+        for c, score in matches
+    ]
 
 
 @router.get("/{customer_id}", response_model=CustomerDetail)
@@ -21,6 +21,7 @@ from app.schemas.email import (
 )
 from app.services.gmail_service import gmail_service
 from app.services.email_service import EmailService
+from app.services.pagination import NEXT_CURSOR_HEADER, next_cursor
 from app.templates.email_templates import get_all_templates, render_template
 from app.models.email_campaign import RecipientFilter
 
@@ -200,13 +201,25 @@ def send_campaign(
 @router.get("/campaigns/{campaign_id}/logs", response_model=List[EmailLogResponse])
 def get_campaign_logs(
     campaign_id: UUID,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    """取得活動的發送紀錄"""
+    """取得活動的發送紀錄（下一頁 cursor 見 X-Next-Cursor 標頭）"""
     service = EmailService(db)
-    return service.get_email_logs(campaign_id=campaign_id, skip=skip, limit=limit)
+    try:
+        logs = service.get_email_logs(
+            campaign_id=campaign_id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    cursor_value = next_cursor(logs, limit, lambda log: log.created_at, lambda log: log.id)
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    return logs
 
 
 # ==================== 測試郵件 ====================
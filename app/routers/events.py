@@ -1,11 +1,12 @@
 from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import Event, EventRegistration, Customer
 from app.schemas.event import EventResponse, EventRegistrationResponse
+from app.services.pagination import NEXT_CURSOR_HEADER, apply_keyset, next_cursor
 
 router = APIRouter(prefix="/api/events", tags=["events"])
 
@@ -61,20 +62,37 @@ def get_event(event_id: UUID, db: Session = Depends(get_db)):
 @router.get("/{event_id}/registrations", response_model=list[EventRegistrationResponse])
 def get_event_registrations(
     event_id: UUID,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor from X-Next-Cursor; replaces skip"),
     db: Session = Depends(get_db)
 ):
-    """Get registrations for an event."""
+    """Get registrations for an event, ordered by (created_at, id)."""
     event = db.query(Event).filter(Event.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    registrations = db.query(EventRegistration, Customer).join(
+    query = db.query(EventRegistration, Customer).join(
         Customer, EventRegistration.customer_id == Customer.id
     ).filter(
         EventRegistration.event_id == event_id
-    ).offset(skip).limit(limit).all()
+    )
+
+    try:
+        query = apply_keyset(query, EventRegistration.created_at, EventRegistration.id, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not cursor:
+        query = query.offset(skip)
+
+    registrations = query.limit(limit).all()
+
+    cursor_value = next_cursor(
+        registrations, limit, lambda row: row[0].created_at, lambda row: row[0].id
+    )
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
 
     return [
         EventRegistrationResponse(
@@ -0,0 +1,100 @@
+import os
+import shutil
+from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from app.config import IMPORT_MAX_UPLOAD_BYTES
+from app.schemas.imports import ImportJobCreate, ImportJobResponse, ImportSourceEnum
+from app.services.import_jobs import import_job_manager
+
+router = APIRouter(prefix="/api/imports", tags=["imports"])
+
+SOURCE_EXTENSIONS = {
+    ImportSourceEnum.ACCUPASS: ".csv",
+    ImportSourceEnum.PORTALY: ".xlsx",
+}
+
+# Upload bytes buffered before each write, so disk writes leave the event loop in large blocks
+UPLOAD_WRITE_SIZE = 1 << 20
+
+
+@router.post("", response_model=ImportJobResponse, status_code=202)
+def create_import_job(job_in: ImportJobCreate):
+    """Start a background import of a file or directory under IMPORT_DATA_DIR."""
+    try:
+        path = import_job_manager.resolve_server_path(job_in.source.value, job_in.path)
+        job = import_job_manager.submit(
+            job_in.source.value, path, job_in.force, job_in.use_copy, name=job_in.path
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.to_dict()
+
+
+@router.post("/upload", response_model=ImportJobResponse, status_code=202)
+async def upload_import_file(
+    request: Request,
+    source: ImportSourceEnum,
+    filename: str = Query(..., description="Original file name; Accupass event name and date come from it"),
+    use_copy: bool = False,
+):
+    """Upload one CSV/XLSX as the raw request body and import it in the background.
+
+    The body is streamed to disk in chunks, so large files are never held in
+    memory, and all file I/O runs in the threadpool. Every upload is imported:
+    uploads land in a fresh directory, so the import manifest is not used.
+    """
+    filename = os.path.basename(filename)
+    if not filename.endswith(SOURCE_EXTENSIONS[source]):
+        raise HTTPException(status_code=400, detail=f"{source.value} uploads must be {SOURCE_EXTENSIONS[source]} files")
+
+    upload_dir = await run_in_threadpool(import_job_manager.new_upload_dir)
+    path = os.path.join(upload_dir, filename)
+    try:
+        f = await run_in_threadpool(open, path, "wb")
+        try:
+            size = 0
+            pending = bytearray()
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > IMPORT_MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+                pending += chunk
+                if len(pending) >= UPLOAD_WRITE_SIZE:
+                    await run_in_threadpool(f.write, pending)
+                    pending = bytearray()
+            if pending:
+                await run_in_threadpool(f.write, pending)
+            # Leave nothing for close() to write on the event loop
+            await run_in_threadpool(f.flush)
+        finally:
+            f.close()
+
+        # Accupass imports read a directory of CSVs
+        target = upload_dir if source == ImportSourceEnum.ACCUPASS else path
+        try:
+            job = import_job_manager.submit(
+                source.value, target, use_copy=use_copy, upload_dir=upload_dir, name=filename
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        # Also runs on cancellation, where awaiting is not possible
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        raise
+    return job.to_dict()
+
+
+@router.get("", response_model=List[ImportJobResponse])
+def list_import_jobs():
+    """List recent import jobs, newest first."""
+    return [job.to_dict() for job in import_job_manager.recent()]
+
+
+@router.get("/{job_id}", response_model=ImportJobResponse)
+def get_import_job(job_id: str):
+    """Get the status, throughput and per-file stats of an import job."""
+    job = import_job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict()
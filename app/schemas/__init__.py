@@ -1,9 +1,13 @@
-from app.schemas.customer import CustomerBase, CustomerCreate, CustomerResponse, CustomerDetail
+from app.schemas.customer import (
+    CustomerBase, CustomerCreate, CustomerResponse, CustomerDetail, CustomerSearchResult
+)
 from app.schemas.event import EventBase, EventResponse, EventRegistrationResponse
 from app.schemas.analytics import OverviewStats, ConversionAnalysis, EventPerformance
+from app.schemas.imports import ImportSourceEnum, ImportJobCreate, ImportJobResponse
 
 __all__ = [
-    "CustomerBase", "CustomerCreate", "CustomerResponse", "CustomerDetail",
+    "CustomerBase", "CustomerCreate", "CustomerResponse", "CustomerDetail", "CustomerSearchResult",
     "EventBase", "EventResponse", "EventRegistrationResponse",
-    "OverviewStats", "ConversionAnalysis", "EventPerformance"
+    "OverviewStats", "ConversionAnalysis", "EventPerformance",
+    "ImportSourceEnum", "ImportJobCreate", "ImportJobResponse"
 ]
@@ -36,4 +36,12 @@ class EventPerformance(BaseModel):
     check_in_rate: float
 
 
+class CacheStats(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    coalesced: int
+    hit_rate: float
+
+
 ConversionAnalysis.model_rebuild()
@@ -29,6 +29,13 @@ class CustomerResponse(CustomerBase):
         from_attributes = True
 
 
+class CustomerSearchResult(BaseModel):
+    id: UUID
+    name: Optional[str] = None
+    email: str
+    score: float = 0
+
+
 class CustomerDetail(CustomerResponse):
     events: list["EventSummary"] = []
     purchases: list["PurchaseSummary"] = []
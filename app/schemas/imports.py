@@ -0,0 +1,36 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+
+
+class ImportSourceEnum(str, Enum):
+    ACCUPASS = "accupass"
+    PORTALY = "portaly"
+
+
+class ImportJobCreate(BaseModel):
+    source: ImportSourceEnum
+    # Relative to IMPORT_DATA_DIR: a directory of CSVs for Accupass, an .xlsx for Portaly
+    path: str
+    force: bool = False
+    use_copy: bool = False
+
+
+class ImportJobResponse(BaseModel):
+    id: str
+    source: ImportSourceEnum
+    path: str
+    status: str
+    force: bool
+    use_copy: bool
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    total_rows: Optional[int] = None
+    processed_rows: int
+    rows_per_second: float
+    percent_done: Optional[float] = None
+    files: Dict[str, Dict[str, Any]]
+    stats: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -1,40 +1,45 @@
-from sqlalchemy import func, distinct
+from datetime import date
+from typing import Optional
+from sqlalchemy import func, distinct, select, exists, case
 from sqlalchemy.orm import Session
 from app.models import Customer, Event, EventRegistration, Product, Purchase
 from app.schemas.analytics import OverviewStats, ConversionAnalysis, EventConversion, EventPerformance
+from app.services.cache import GenerationCache
+
+# Analytics results, valid until the next import bumps the data generation
+analytics_cache = GenerationCache()
 
 
 class AnalyticsService:
     def __init__(self, db: Session):
         self.db = db
 
+    @analytics_cache.cached
     def get_overview_stats(self) -> OverviewStats:
-        """Get overall CRM statistics."""
-        total_customers = self.db.query(func.count(Customer.id)).scalar()
-        total_events = self.db.query(func.count(Event.id)).scalar()
-        total_registrations = self.db.query(func.count(EventRegistration.id)).scalar()
-        total_purchases = self.db.query(func.count(Purchase.id)).scalar()
-        total_revenue = self.db.query(func.sum(Purchase.amount)).scalar() or 0
-
-        # Customers with purchases
-        customers_with_purchases = self.db.query(
-            func.count(distinct(Purchase.customer_id))
-        ).scalar()
-
-        # Customers with events but no purchases
-        customers_with_events = self.db.query(
-            func.count(distinct(EventRegistration.customer_id))
-        ).scalar()
-
-        # Customers who attended events and also purchased
-        customers_events_and_purchases = self.db.query(
-            func.count(distinct(EventRegistration.customer_id))
-        ).filter(
-            EventRegistration.customer_id.in_(
-                self.db.query(Purchase.customer_id)
-            )
-        ).scalar()
+        """Get overall CRM statistics in a single statement."""
+        # Customers who attended events and also purchased (semi-join on both sides)
+        events_and_purchases = select(func.count(Customer.id)).where(
+            exists().where(EventRegistration.customer_id == Customer.id),
+            exists().where(Purchase.customer_id == Customer.id)
+        )
 
+        row = self.db.execute(select(
+            select(func.count(Customer.id)).scalar_subquery().label("total_customers"),
+            select(func.count(Event.id)).scalar_subquery().label("total_events"),
+            select(func.count(EventRegistration.id)).scalar_subquery().label("total_registrations"),
+            select(func.count(Purchase.id)).scalar_subquery().label("total_purchases"),
+            select(func.coalesce(func.sum(Purchase.amount), 0)).scalar_subquery().label("total_revenue"),
+            select(
+                func.count(distinct(Purchase.customer_id))
+            ).scalar_subquery().label("customers_with_purchases"),
+            select(
+                func.count(distinct(EventRegistration.customer_id))
+            ).scalar_subquery().label("customers_with_events"),
+            events_and_purchases.scalar_subquery().label("customers_events_and_purchases"),
+        )).one()
+
+        customers_with_events = row.customers_with_events
+        customers_events_and_purchases = row.customers_events_and_purchases
         customers_with_events_only = customers_with_events - customers_events_and_purchases
 
         conversion_rate = (
@@ -43,99 +48,137 @@ class AnalyticsService:
         )
 
         return OverviewStats(
-            total_customers=total_customers,
-            total_events=total_events,
-            total_event_registrations=total_registrations,
-            total_purchases=total_purchases,
-            total_revenue=float(total_revenue),
-            customers_with_purchases=customers_with_purchases,
+            total_customers=row.total_customers,
+            total_events=row.total_events,
+            total_event_registrations=row.total_registrations,
+            total_purchases=row.total_purchases,
+            total_revenue=float(row.total_revenue),
+            customers_with_purchases=row.customers_with_purchases,
             customers_with_events_only=customers_with_events_only,
             conversion_rate=round(conversion_rate, 2)
         )
 
+    @analytics_cache.cached
     def get_conversion_analysis(self) -> ConversionAnalysis:
         """Analyze conversion from event attendance to purchase."""
-        # All unique event attendees
-        event_attendees = self.db.query(
-            distinct(EventRegistration.customer_id)
-        ).all()
-        attendee_ids = {a[0] for a in event_attendees}
-
-        # Purchasers
-        purchasers = self.db.query(
-            distinct(Purchase.customer_id)
-        ).all()
-        purchaser_ids = {p[0] for p in purchasers}
+        # Attended events AND purchased
+        converted = select(func.count(Customer.id)).where(
+            exists().where(EventRegistration.customer_id == Customer.id),
+            exists().where(Purchase.customer_id == Customer.id)
+        )
 
-        # Converted (attended events AND purchased)
-        converted_ids = attendee_ids & purchaser_ids
+        row = self.db.execute(select(
+            select(
+                func.count(distinct(EventRegistration.customer_id))
+            ).scalar_subquery().label("attendees"),
+            select(
+                func.count(distinct(Purchase.customer_id))
+            ).scalar_subquery().label("purchasers"),
+            converted.scalar_subquery().label("converted"),
+        )).one()
 
         # Purchased without attending events
-        purchased_without_events = purchaser_ids - attendee_ids
+        purchased_without_events = row.purchasers - row.converted
 
         conversion_rate = (
-            (len(converted_ids) / len(attendee_ids) * 100)
-            if attendee_ids else 0
+            (row.converted / row.attendees * 100)
+            if row.attendees else 0
         )
 
         # Get top converting events
-        top_events = self._get_top_converting_events(purchaser_ids)
+        top_events = self._get_top_converting_events()
 
         return ConversionAnalysis(
-            total_event_attendees=len(attendee_ids),
-            converted_to_purchase=len(converted_ids),
+            total_event_attendees=row.attendees,
+            converted_to_purchase=row.converted,
             conversion_rate=round(conversion_rate, 2),
-            purchased_without_events=len(purchased_without_events),
+            purchased_without_events=purchased_without_events,
             top_converting_events=top_events
         )
 
-    def _get_top_converting_events(self, purchaser_ids: set, limit: int = 10) -> list[EventConversion]:
-        """Get events with highest conversion rates."""
-        events = self.db.query(Event).all()
-        results = []
-
-        for event in events:
-            registrations = self.db.query(EventRegistration).filter(
-                EventRegistration.event_id == event.id
-            ).all()
-
-            total_regs = len(registrations)
-            if total_regs == 0:
-                continue
-
-            converted = sum(1 for r in registrations if r.customer_id in purchaser_ids)
-            conv_rate = (converted / total_regs * 100) if total_regs > 0 else 0
-
-            results.append(EventConversion(
-                event_name=event.name,
-                total_registrations=total_regs,
-                converted_to_purchase=converted,
-                conversion_rate=round(conv_rate, 2)
-            ))
+    def _get_top_converting_events(self, limit: int = 10) -> list[EventConversion]:
+        """Get events with highest conversion rates, ranked and limited in SQL."""
+        purchased = exists().where(Purchase.customer_id == EventRegistration.customer_id)
+        total_regs = func.count(EventRegistration.id)
+        converted = func.sum(case((purchased, 1), else_=0))
+        conv_rate = converted * 100.0 / total_regs
+
+        rows = self.db.query(
+            Event.name,
+            total_regs.label("total_regs"),
+            converted.label("converted"),
+            conv_rate.label("conv_rate")
+        ).join(
+            EventRegistration, EventRegistration.event_id == Event.id
+        ).group_by(
+            Event.id, Event.name
+        ).order_by(
+            conv_rate.desc(), Event.name
+        ).limit(limit).all()
+
+        return [
+            EventConversion(
+                event_name=row.name,
+                total_registrations=row.total_regs,
+                converted_to_purchase=row.converted,
+                conversion_rate=round(float(row.conv_rate), 2)
+            )
+            for row in rows
+        ]
+
+    @analytics_cache.cached
+    def get_event_performance(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> list[EventPerformance]:
+        """Get performance metrics for events, aggregated in a single query."""
+        # Select the page of events first so only its registrations are aggregated
+        events = self.db.query(Event.id, Event.name, Event.event_date)
+        if start_date:
+            events = events.filter(Event.event_date >= start_date)
+        if end_date:
+            events = events.filter(Event.event_date <= end_date)
+        events = events.order_by(Event.event_date.desc(), Event.id).offset(skip)
+        if limit is not None:
+            events = events.limit(limit)
+        page = events.subquery()
+
+        registrations = (
+            select(
+                EventRegistration.event_id,
+                func.count(EventRegistration.id).label("total_regs"),
+                func.count(EventRegistration.id).filter(
+                    EventRegistration.checked_in.is_(True)
+                ).label("checked_in")
+            )
+            .where(EventRegistration.event_id.in_(select(page.c.id)))
+            .group_by(EventRegistration.event_id)
+            .subquery()
+        )
 
-        # Sort by conversion rate descending
-        results.sort(key=lambda x: x.conversion_rate, reverse=True)
-        return results[:limit]
+        query = self.db.query(
+            page.c.name,
+            page.c.event_date,
+            func.coalesce(registrations.c.total_regs, 0).label("total_regs"),
+            func.coalesce(registrations.c.checked_in, 0).label("checked_in")
+        ).outerjoin(
+            registrations, registrations.c.event_id == page.c.id
+        ).order_by(
+            page.c.event_date.desc(), page.c.id
+        )
 
-    def get_event_performance(self) -> list[EventPerformance]:
-        """Get performance metrics for all events."""
-        events = self.db.query(Event).order_by(Event.event_date.desc()).all()
         results = []
-
-        for event in events:
-            registrations = self.db.query(EventRegistration).filter(
-                EventRegistration.event_id == event.id
-            ).all()
-
-            total_regs = len(registrations)
-            checked_in = sum(1 for r in registrations if r.checked_in)
-            check_in_rate = (checked_in / total_regs * 100) if total_regs > 0 else 0
+        for row in query.all():
+            check_in_rate = (row.checked_in / row.total_regs * 100) if row.total_regs > 0 else 0
 
             results.append(EventPerformance(
-                event_name=event.name,
-                event_date=str(event.event_date) if event.event_date else None,
-                total_registrations=total_regs,
-                checked_in_count=checked_in,
+                event_name=row.name,
+                event_date=str(row.event_date) if row.event_date else None,
+                total_registrations=row.total_regs,
+                checked_in_count=row.checked_in,
                 check_in_rate=round(check_in_rate, 2)
             ))
 
@@ -0,0 +1,34 @@
+from sqlalchemy import Table, bindparam, cast, column, update, values
+from sqlalchemy.orm import Session
+
+
+def bulk_update(db: Session, table: Table, rows: list[dict], key: str = "id"):
+    """Give each row (matched on key) its own new values, in as few statements as possible.
+
+    PostgreSQL gets a single UPDATE ... FROM (VALUES ...); other dialects fall
+    back to an executemany of single-row UPDATEs. Every row must set the same
+    columns.
+    """
+    if not rows:
+        return
+    columns = [name for name in rows[0] if name != key]
+
+    if db.get_bind().dialect.name == "postgresql":
+        names = [key, *columns]
+        data = values(
+            *[column(name, table.c[name].type) for name in names], name="v"
+        ).data([tuple(row[name] for name in names) for row in rows])
+        # VALUES columns come back untyped (text), hence the casts
+        db.execute(
+            update(table)
+            .where(table.c[key] == data.c[key])
+            .values({name: cast(data.c[name], table.c[name].type) for name in columns})
+        )
+        return
+
+    db.execute(
+        update(table)
+        .where(table.c[key] == bindparam(f"b_{key}"))
+        .values({name: bindparam(f"b_{name}") for name in columns}),
+        [{f"b_{name}": value for name, value in row.items()} for row in rows],
+    )
@@ -0,0 +1,135 @@
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import DataGeneration
+
+# Generation shared by everything derived from customers, events and purchases
+CRM_DATA = "crm_data"
+
+
+def get_data_generation(db: Session, name: str = CRM_DATA) -> int:
+    """Current data generation (0 if nothing has been written yet)."""
+    generation = db.query(DataGeneration.generation).filter(
+        DataGeneration.name == name
+    ).scalar()
+    return generation or 0
+
+
+def bump_data_generation(db: Session, name: str = CRM_DATA):
+    """Invalidate cached results. Runs inside the caller's transaction."""
+    result = db.execute(
+        update(DataGeneration)
+        .where(DataGeneration.name == name)
+        .values(generation=DataGeneration.generation + 1)
+    )
+    if result.rowcount:
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(DataGeneration(name=name, generation=1))
+    except IntegrityError:
+        # Another writer created the row first
+        db.execute(
+            update(DataGeneration)
+            .where(DataGeneration.name == name)
+            .values(generation=DataGeneration.generation + 1)
+        )
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class GenerationCache:
+    """Thread-safe LRU cache whose entries are valid for one data generation.
+
+    Concurrent misses on the same key share a single computation: the first
+    caller computes while the others wait for its result.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[int, Any]] = OrderedDict()
+        self._in_flight: dict[tuple[Hashable, int], _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_compute(self, db: Session, key: Hashable, compute: Callable[[], Any]) -> Any:
+        generation = get_data_generation(db)
+        flight_key = (key, generation)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            flight = self._in_flight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._in_flight[flight_key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[flight_key]
+                if flight.error is None:
+                    self._entries[key] = (generation, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+
+        return flight.value
+
+    def cached(self, method: Callable) -> Callable:
+        """Decorate a service method; the service must expose its session as `self.db`."""
+        @functools.wraps(method)
+        def wrapper(service, *args, **kwargs):
+            key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+            return self.get_or_compute(
+                service.db, key, lambda: method(service, *args, **kwargs)
+            )
+        return wrapper
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups * 100, 2) if lookups else 0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,303 @@
+import secrets
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from app.config import (
+    EMAIL_SEND_WORKERS,
+    EMAIL_SEND_RATE,
+    EMAIL_SEND_BURST,
+    EMAIL_SEND_BATCH_SIZE,
+    EMAIL_LOG_FLUSH_ROWS,
+    EMAIL_LOG_FLUSH_SECONDS,
+)
+from app.database import SessionLocal
+from app.models.email_campaign import EmailCampaign
+from app.models.email_log import EmailStatus
+from app.services.email_outbox import CampaignOutbox
+from app.services.gmail_service import MAX_BATCH_SIZE, PreparedEmail, gmail_service
+
+# Tracking pixel base URL (應從環境變數讀取)
+TRACKING_BASE_URL = "http://localhost:8000"
+
+DEFAULT_CUSTOMER_NAME = "親愛的顧客"
+
+# 寫入發送紀錄失敗後，以新的 DB Session 重試寫回的次數與第一次重試前的等待秒數（之後每次加倍）
+FLUSH_RETRIES = 3
+FLUSH_RETRY_DELAY = 1.0
+
+# 本程序中正在發送的活動
+_active_campaigns: set = set()
+_active_lock = threading.Lock()
+
+
+class Recipient:
+    """收件人（只保留個人化需要的欄位，大量串流時每筆只佔幾十 bytes）"""
+    __slots__ = ("id", "email", "name")
+
+    def __init__(self, id: UUID, email: str, name: Optional[str]):
+        self.id = id
+        self.email = email
+        self.name = name
+
+
+class OutgoingEmail(NamedTuple):
+    subject: str
+    html_content: str
+    text_content: Optional[str]
+    pixel_token: str
+
+
+def generate_pixel_token() -> str:
+    """產生唯一的追蹤 token"""
+    return secrets.token_urlsafe(32)
+
+
+def insert_tracking_pixel(html_content: str, pixel_token: str) -> str:
+    """在 HTML 內容中插入追蹤像素"""
+    tracking_pixel = f'<img src="{TRACKING_BASE_URL}/api/email/track/{pixel_token}.png" width="1" height="1" style="display:none;" alt="" />'
+    # 在 </body> 前插入，若無則插入到最後
+    if "</body>" in html_content:
+        return html_content.replace("</body>", f"{tracking_pixel}</body>")
+    return html_content + tracking_pixel
+
+
+class CampaignContent(NamedTuple):
+    """活動內容快照（不綁定 Session，可在發送執行緒中安全使用）"""
+    campaign_id: UUID
+    subject: str
+    content_html: str
+    content_text: Optional[str]
+
+    @classmethod
+    def from_campaign(cls, campaign: EmailCampaign) -> "CampaignContent":
+        return cls(campaign.id, campaign.subject, campaign.content_html, campaign.content_text)
+
+    def render(self, recipient: Recipient) -> OutgoingEmail:
+        """個人化內容並插入追蹤像素"""
+        name = recipient.name or DEFAULT_CUSTOMER_NAME
+        pixel_token = generate_pixel_token()
+        html_content = insert_tracking_pixel(
+            self.content_html.replace("{customer_name}", name), pixel_token
+        )
+        text_content = None
+        if self.content_text:
+            text_content = self.content_text.replace("{customer_name}", name)
+        return OutgoingEmail(
+            subject=self.subject.replace("{customer_name}", name),
+            html_content=html_content,
+            text_content=text_content,
+            pixel_token=pixel_token,
+        )
+
+
+@contextmanager
+def delivering(campaign_id: UUID) -> Iterator[bool]:
+    """標記活動正在本程序中發送；同一活動已在發送時得到 False"""
+    with _active_lock:
+        acquired = campaign_id not in _active_campaigns
+        _active_campaigns.add(campaign_id)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with _active_lock:
+                _active_campaigns.discard(campaign_id)
+
+
+class TokenBucket:
+    """令牌桶限流：平均每秒補充 rate 個令牌，最多累積 burst 個（執行緒安全）"""
+
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0:
+            raise ValueError("rate 必須大於 0")
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1):
+        """取得令牌，不足時阻塞等待
+
+        超過桶容量的請求在桶滿時放行並記為欠額，之後的請求會等到欠額補齊。
+        """
+        needed = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CampaignSender:
+    """以多個發送執行緒併發寄出活動郵件
+
+    收件人來自活動的待發送佇列（CampaignOutbox）。每個執行緒使用自己的 DB Session，
+    一次認領最多 send_batch_size 位收件人，在同一個交易中一次寫入這批的 EmailLog，
+    再以 Gmail HTTP batch 寄出。發送結果先留在記憶體，累積 flush_rows 筆或 flush_seconds 秒
+    後才一次寫回 EmailLog、佇列狀態與活動的 sent_count / failed_count。
+    所有執行緒共用一個令牌桶（每封郵件一個令牌），讓總發送速率符合 Gmail 配額。
+    """
+
+    def __init__(
+        self,
+        content: CampaignContent,
+        workers: int = EMAIL_SEND_WORKERS,
+        rate: float = EMAIL_SEND_RATE,
+        burst: int = EMAIL_SEND_BURST,
+        send_batch_size: int = EMAIL_SEND_BATCH_SIZE,
+        flush_rows: int = EMAIL_LOG_FLUSH_ROWS,
+        flush_seconds: float = EMAIL_LOG_FLUSH_SECONDS,
+    ):
+        self.content = content
+        self.workers = max(workers, 1)
+        self.send_batch_size = min(max(send_batch_size, 1), MAX_BATCH_SIZE)
+        self.flush_rows = max(flush_rows, 1)
+        self.flush_seconds = flush_seconds
+        self.limiter = TokenBucket(rate, burst)
+        self.sent_count = 0
+        self.failed_count = 0
+        self.error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self) -> bool:
+        """發送到佇列清空為止，回傳是否順利完成（寫入紀錄失敗時會提前中止）"""
+        threads = [
+            threading.Thread(target=self._worker, name=f"campaign-sender-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.error is None
+
+    def _worker(self):
+        db = SessionLocal()
+        outbox = CampaignOutbox(db, self.content.campaign_id)
+        results: List[dict] = []
+        flushed_at = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                recipients = [Recipient(*row) for row in outbox.claim(self.send_batch_size)]
+                if not recipients:
+                    db.commit()
+                    break
+                logs, emails = self._prepare(recipients)
+                outbox.insert_logs(logs)
+                db.commit()
+
+                results.extend(self._send(logs, emails))
+                if len(results) >= self.flush_rows or time.monotonic() - flushed_at >= self.flush_seconds:
+                    self._flush(db, outbox, results)
+                    results = []
+                    flushed_at = time.monotonic()
+            self._flush(db, outbox, results)
+        except Exception as e:
+            db.rollback()
+            error = f"寫入發送紀錄失敗: {e}"
+            unsaved = self._salvage(results)
+            if unsaved:
+                error += f"（{unsaved} 筆發送結果未能寫回）"
+            with self._lock:
+                if self.error is None:
+                    self.error = error
+            self._stop.set()
+        finally:
+            db.close()
+
+    def _prepare(self, recipients: List[Recipient]) -> Tuple[List[dict], List[OutgoingEmail]]:
+        """個人化每封郵件，回傳待寫入的 EmailLog 與對應的郵件內容"""
+        logs = []
+        emails = []
+        for recipient in recipients:
+            email = self.content.render(recipient)
+            emails.append(email)
+            logs.append({
+                "id": uuid.uuid4(),
+                "campaign_id": self.content.campaign_id,
+                "customer_id": recipient.id,
+                "recipient_email": recipient.email,
+                "recipient_name": recipient.name,
+                "subject": email.subject,
+                "pixel_token": email.pixel_token,
+                "status": EmailStatus.PENDING,
+            })
+        return logs, emails
+
+    def _send(self, logs: List[dict], emails: List[OutgoingEmail]) -> List[dict]:
+        self.limiter.acquire(len(logs))
+        results = gmail_service.send_batch([
+            PreparedEmail(
+                to_email=log["recipient_email"],
+                subject=email.subject,
+                html_content=email.html_content,
+                text_content=email.text_content,
+            )
+            for log, email in zip(logs, emails)
+        ])
+
+        now = datetime.utcnow()
+        return [
+            {
+                "id": log["id"],
+                "customer_id": log["customer_id"],
+                "status": EmailStatus.SENT if success else EmailStatus.FAILED,
+                "gmail_message_id": message_id,
+                "error_message": error,
+                "sent_at": now if success else None,
+            }
+            for log, (success, message_id, error) in zip(logs, results)
+        ]
+
+    def _flush(self, db, outbox: CampaignOutbox, results: List[dict]):
+        if not results:
+            return
+        outbox.complete(results)
+        db.commit()
+
+        sent = sum(1 for r in results if r["status"] == EmailStatus.SENT)
+        with self._lock:
+            self.sent_count += sent
+            self.failed_count += len(results) - sent
+
+    def _salvage(self, results: List[dict]) -> int:
+        """寫入失敗後，以新的 Session 重試寫回緩衝中的發送結果，回傳未能寫回的筆數
+
+        整批仍寫不回時至少寫回已寄出（SENT）的結果：這些郵件 Gmail 已接受，
+        沒有紀錄會在認領逾時後被誤記為中斷失敗。其餘收件人之後同樣記為中斷失敗，不會重寄。
+        """
+        if not results or self._retry_flush(results):
+            return 0
+        sent = [r for r in results if r["status"] == EmailStatus.SENT]
+        if sent and len(sent) < len(results) and self._retry_flush(sent):
+            return len(results) - len(sent)
+        return len(results)
+
+    def _retry_flush(self, results: List[dict]) -> bool:
+        for attempt in range(FLUSH_RETRIES):
+            if attempt:
+                time.sleep(FLUSH_RETRY_DELAY * 2 ** (attempt - 1))
+            db = SessionLocal()
+            try:
+                self._flush(db, CampaignOutbox(db, self.content.campaign_id), results)
+                return True
+            except Exception:
+                db.rollback()
+            finally:
+                db.close()
+        return False
@@ -0,0 +1,287 @@
+import bisect
+import heapq
+import threading
+from collections import defaultdict
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import func, or_, union_all, select
+from sqlalchemy.orm import Session
+from app.models import Customer
+from app.services.cache import get_data_generation
+
+# Above this many matches the in-process index falls back to a table scan filter
+MAX_IN_LIST_IDS = 5000
+
+
+def _escape_like(term: str) -> str:
+    """Escape LIKE wildcards in user input."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _rank(term: str, name: str, email: str) -> tuple:
+    """Sort key for a match: exact, then prefix, then word-start, then substring."""
+    best = 3
+    for value in (name, email):
+        if not value or term not in value:
+            continue
+        if value == term:
+            best = 0
+        elif value.startswith(term):
+            best = min(best, 1)
+        elif f" {term}" in value or f"@{term}" in value or f".{term}" in value:
+            best = min(best, 2)
+    return best, len(name or email)
+
+
+class CustomerSearchIndex:
+    """In-process customer search index for databases without pg_trgm.
+
+    Keeps a trigram inverted index for substring search and a sorted key list
+    for prefix typeahead. Like GenerationCache, the index is valid for one data
+    generation and is reloaded once another writer (e.g. an import script) moves
+    it. DataImportService adds the customers it commits, which keeps the index
+    current across this process's own imports without a reload.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Data generation the index was loaded at (None until loaded)
+        self._generation: Optional[int] = None
+        self._docs: dict[UUID, tuple[str, str]] = {}
+        self._postings: dict[str, set[UUID]] = defaultdict(set)
+        self._prefix_keys: list[tuple[str, UUID]] = []
+
+    @property
+    def generation(self) -> Optional[int]:
+        return self._generation
+
+    def load(self, db: Session):
+        """Build the index from all customers."""
+        with self._lock:
+            self.clear()
+            # Read before the rows, so a bump during the load triggers another reload
+            generation = get_data_generation(db)
+            rows = db.query(Customer.id, Customer.name, Customer.email).yield_per(10000)
+            for customer_id, name, email in rows:
+                self._add(customer_id, name, email)
+            self._prefix_keys.sort()
+            self._generation = generation
+
+    def ensure_current(self, db: Session):
+        """Load the index, or reload it if the data generation has moved."""
+        generation = get_data_generation(db)
+        if generation == self._generation:
+            return
+        with self._lock:
+            if generation != self._generation:
+                self.load(db)
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._prefix_keys.clear()
+            self._generation = None
+
+    def add_committed(self, customers: list[tuple[UUID, Optional[str], str]], generation: int):
+        """Add (id, name, email) of customers committed by the transaction that bumped
+        the data to generation.
+
+        Applied only if the index was current just before that transaction;
+        otherwise it is left stale and reloads on next use.
+        """
+        with self._lock:
+            if self._generation is None or self._generation != generation - 1:
+                return
+            for customer_id, name, email in customers:
+                if customer_id in self._docs:
+                    self.remove(customer_id)
+                self._add(customer_id, name, email, keep_sorted=True)
+            self._generation = generation
+
+    def remove(self, customer_id: UUID):
+        with self._lock:
+            doc = self._docs.pop(customer_id, None)
+            if doc is None:
+                return
+            for value in doc:
+                for gram in _trigrams(value):
+                    self._postings[gram].discard(customer_id)
+                if value:
+                    pos = bisect.bisect_left(self._prefix_keys, (value, customer_id))
+                    if pos < len(self._prefix_keys) and self._prefix_keys[pos] == (value, customer_id):
+                        del self._prefix_keys[pos]
+
+    def _add(self, customer_id: UUID, name: Optional[str], email: Optional[str], keep_sorted: bool = False):
+        doc = ((name or "").lower(), (email or "").lower())
+        self._docs[customer_id] = doc
+        for value in doc:
+            if not value:
+                continue
+            for gram in _trigrams(value):
+                self._postings[gram].add(customer_id)
+            if keep_sorted:
+                bisect.insort(self._prefix_keys, (value, customer_id))
+            else:
+                self._prefix_keys.append((value, customer_id))
+
+    def _candidates(self, term: str):
+        grams = _trigrams(term)
+        if not grams:
+            return self._docs.keys()
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def matching_ids(self, term: str, max_ids: Optional[int] = None) -> Optional[list[UUID]]:
+        """Unranked IDs matching term, or None if there may be more than max_ids."""
+        term = term.lower()
+        with self._lock:
+            candidates = self._candidates(term)
+            if max_ids is not None and len(candidates) > max_ids:
+                return None
+            return [
+                customer_id for customer_id in candidates
+                if term in self._docs[customer_id][0] or term in self._docs[customer_id][1]
+            ]
+
+    def search(self, term: str, limit: Optional[int] = None) -> list[UUID]:
+        """Customer IDs whose name or email contains term, best matches first."""
+        term = term.lower()
+        with self._lock:
+            candidates = self._candidates(term)
+            matches = []
+            for customer_id in candidates:
+                name, email = self._docs[customer_id]
+                if term in name or term in email:
+                    matches.append((_rank(term, name, email), customer_id))
+
+        if limit:
+            matches = heapq.nsmallest(limit, matches, key=lambda m: m[0])
+        else:
+            matches.sort(key=lambda m: m[0])
+        return [customer_id for _, customer_id in matches]
+
+    def typeahead(self, prefix: str, limit: int = 10) -> list[UUID]:
+        """Top customers whose name or email starts with prefix."""
+        prefix = prefix.lower()
+        # Look a little past `limit` so shorter (closer) keys can be ranked first
+        window = limit * 4
+        candidates: list[tuple[str, UUID]] = []
+        with self._lock:
+            pos = bisect.bisect_left(self._prefix_keys, (prefix,))
+            end = min(pos + window, len(self._prefix_keys))
+            while pos < end:
+                value, customer_id = self._prefix_keys[pos]
+                if not value.startswith(prefix):
+                    break
+                candidates.append((value, customer_id))
+                pos += 1
+
+        candidates.sort(key=lambda c: (len(c[0]), c[0]))
+        results: list[UUID] = []
+        for _, customer_id in candidates:
+            if customer_id not in results:
+                results.append(customer_id)
+        return results[:limit]
+
+
+# Global instance
+customer_search_index = CustomerSearchIndex()
+
+
+class CustomerSearchService:
+    """Customer search backed by pg_trgm on Postgres and CustomerSearchIndex elsewhere."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    def _index(self) -> CustomerSearchIndex:
+        customer_search_index.ensure_current(self.db)
+        return customer_search_index
+
+    def search_filter(self, term: str):
+        """Filter clause matching customers whose name or email contains term."""
+        if self.is_postgres:
+            # Served by the gin_trgm_ops indexes on name and email
+            return self._ilike_filter(term)
+        ids = self._index().matching_ids(term, MAX_IN_LIST_IDS)
+        if ids is None:
+            # Broad terms: one table scan is cheaper than a huge IN list
+            return self._ilike_filter(term)
+        return Customer.id.in_(ids)
+
+    def _ilike_filter(self, term: str):
+        pattern = f"%{_escape_like(term)}%"
+        return or_(
+            Customer.name.ilike(pattern, escape="\\"),
+            Customer.email.ilike(pattern, escape="\\")
+        )
+
+    def search(self, term: str, limit: int = 20) -> list[tuple[Customer, float]]:
+        """Customers matching term, ranked by relevance."""
+        if self.is_postgres:
+            score = func.greatest(
+                func.similarity(func.coalesce(Customer.name, ""), term),
+                func.similarity(Customer.email, term)
+            )
+            return (
+                self.db.query(Customer, score)
+                .filter(self.search_filter(term))
+                .order_by(score.desc(), Customer.id)
+                .limit(limit)
+                .all()
+            )
+
+        ids = self._index().search(term, limit)
+        return self._load_ranked(ids)
+
+    def typeahead(self, prefix: str, limit: int = 10) -> list[tuple[Customer, float]]:
+        """Top-k customers whose name or email starts with prefix."""
+        if self.is_postgres:
+            pattern = f"{_escape_like(prefix.lower())}%"
+            # Two range scans of the COLLATE "C" lower() indexes, already in key
+            # order, that each stop after `limit` rows
+            email_key = func.lower(Customer.email).collate("C")
+            name_key = func.lower(Customer.name).collate("C")
+            by_email = (
+                select(Customer.id.label("id"), email_key.label("key"))
+                .where(email_key.like(pattern, escape="\\"))
+                .order_by(email_key)
+                .limit(limit)
+            )
+            by_name = (
+                select(Customer.id.label("id"), name_key.label("key"))
+                .where(name_key.like(pattern, escape="\\"))
+                .order_by(name_key)
+                .limit(limit)
+            )
+            matches = union_all(by_name.subquery().select(), by_email.subquery().select()).subquery()
+            rows = self.db.execute(
+                select(matches.c.id).order_by(func.length(matches.c.key), matches.c.key)
+            ).all()
+
+            ids = []
+            for (customer_id,) in rows:
+                if customer_id not in ids:
+                    ids.append(customer_id)
+            return self._load_ranked(ids[:limit])
+
+        return self._load_ranked(self._index().typeahead(prefix, limit))
+
+    def _load_ranked(self, ids: list[UUID]) -> list[tuple[Customer, float]]:
+        """Load customers for ids, scored by their position in the list."""
+        if not ids:
+            return []
+        customers = {
+            c.id: c for c in self.db.query(Customer).filter(Customer.id.in_(ids)).all()
+        }
+        return [
+            (customers[customer_id], round(1 - i / len(ids), 4))
+            for i, customer_id in enumerate(ids)
+            if customer_id in customers
+        ]
@@ -0,0 +1,136 @@
+from datetime import datetime
+from typing import Iterable, Optional
+from uuid import UUID
+from sqlalchemy import func, select, delete, case, literal, true
+from sqlalchemy.orm import Session
+from app.models import Customer, CustomerStats, EventRegistration, Purchase
+from app.services.upsert import insert_updating_conflicts
+
+# Customer IDs per refresh statement
+REFRESH_CHUNK_SIZE = 1000
+
+
+def _earliest(a, b):
+    return case((a.is_(None), b), (b.is_(None), a), (a <= b, a), else_=b)
+
+
+def _latest(a, b):
+    return case((a.is_(None), b), (b.is_(None), a), (a >= b, a), else_=b)
+
+
+def activity_filters(has_purchased: Optional[bool] = None, has_events: Optional[bool] = None) -> list:
+    """Filter clauses on CustomerStats; the query must outer join CustomerStats.
+
+    Customers without a stats row are treated as having no activity.
+    """
+    clauses = []
+    if has_purchased is not None:
+        if has_purchased:
+            clauses.append(CustomerStats.has_purchased.is_(True))
+        else:
+            clauses.append(CustomerStats.has_purchased.isnot(True))
+    if has_events is not None:
+        if has_events:
+            clauses.append(CustomerStats.has_attended.is_(True))
+        else:
+            clauses.append(CustomerStats.has_attended.isnot(True))
+    return clauses
+
+
+class CustomerStatsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _stats_select(self, customer_ids: Optional[list[UUID]] = None):
+        """SELECT producing one customer_stats row per customer (or per given ID)."""
+        registrations = (
+            select(
+                EventRegistration.customer_id,
+                func.count(EventRegistration.id).label("event_count"),
+                func.min(EventRegistration.registration_time).label("first_at"),
+                func.max(EventRegistration.registration_time).label("last_at"),
+            )
+            .group_by(EventRegistration.customer_id)
+        )
+        purchases = (
+            select(
+                Purchase.customer_id,
+                func.count(Purchase.id).label("purchase_count"),
+                func.sum(Purchase.amount).label("total_spent"),
+                func.min(Purchase.purchased_at).label("first_at"),
+                func.max(Purchase.purchased_at).label("last_at"),
+            )
+            .group_by(Purchase.customer_id)
+        )
+        customers = select(Customer.id)
+
+        if customer_ids is not None:
+            registrations = registrations.where(EventRegistration.customer_id.in_(customer_ids))
+            purchases = purchases.where(Purchase.customer_id.in_(customer_ids))
+            customers = customers.where(Customer.id.in_(customer_ids))
+
+        registrations = registrations.subquery()
+        purchases = purchases.subquery()
+
+        event_count = func.coalesce(registrations.c.event_count, 0)
+        purchase_count = func.coalesce(purchases.c.purchase_count, 0)
+
+        return (
+            customers.with_only_columns(
+                Customer.id,
+                event_count,
+                purchase_count,
+                func.coalesce(purchases.c.total_spent, 0),
+                _earliest(registrations.c.first_at, purchases.c.first_at),
+                _latest(registrations.c.last_at, purchases.c.last_at),
+                purchase_count > 0,
+                event_count > 0,
+                literal(datetime.utcnow()),
+            )
+            .outerjoin(registrations, registrations.c.customer_id == Customer.id)
+            .outerjoin(purchases, purchases.c.customer_id == Customer.id)
+        )
+
+    def _upsert_stats(self, stats_select):
+        """Write stats rows, replacing existing ones.
+
+        An upsert rather than delete-then-insert, so concurrent imports (which
+        hold different per-source locks) can refresh the same customer.
+        """
+        columns = [
+            "customer_id", "event_count", "purchase_count", "total_spent",
+            "first_activity_at", "last_activity_at", "has_purchased", "has_attended", "updated_at",
+        ]
+        self.db.execute(
+            insert_updating_conflicts(
+                self.db, CustomerStats.__table__, ["customer_id"], columns[1:]
+            ).from_select(
+                columns,
+                # SQLite needs a WHERE clause in INSERT ... SELECT ... ON CONFLICT
+                stats_select.where(true()),
+            )
+        )
+
+    def refresh(self, customer_ids: Iterable[UUID]):
+        """Recompute stats for the given customers. Runs in the caller's transaction."""
+        # Writing in ID order keeps row locks in the same order across concurrent imports
+        ids = sorted(set(customer_ids))
+        for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+            chunk = ids[start:start + REFRESH_CHUNK_SIZE]
+            self._upsert_stats(self._stats_select(chunk).order_by(Customer.id))
+
+    def ensure_built(self) -> bool:
+        """Rebuild if the table is empty but customers exist (e.g. first deploy)."""
+        if self.db.query(CustomerStats.customer_id).first() is not None:
+            return False
+        if self.db.query(Customer.id).first() is None:
+            return False
+        self.rebuild()
+        return True
+
+    def rebuild(self) -> int:
+        """Recompute stats for every customer from scratch."""
+        self.db.execute(delete(CustomerStats))
+        self._upsert_stats(self._stats_select())
+        self.db.flush()
+        return self.db.query(func.count(CustomerStats.customer_id)).scalar()
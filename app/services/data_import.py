@@ -1,205 +1,549 @@
 import os
-import re
+import uuid
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Iterator, Optional
 import pandas as pd
+from sqlalchemy import Column, String, Numeric, DateTime, Boolean, Integer
+from sqlalchemy import select, insert, exists, func, literal
 from sqlalchemy.orm import Session
 from app.models import Customer, Event, EventRegistration, Product, Purchase
+from app.services.cache import bump_data_generation, get_data_generation
+from app.services.customer_search import customer_search_index
+from app.services.customer_stats import CustomerStatsService
+from app.services.import_lock import import_lock
+from app.services.import_manifest import SourceManifest
+from app.services.import_parsing import (
+    ParsedEventFile, UnparseableValues, parse_accupass_file, iter_portaly_chunks
+)
+from app.services.pg_copy import staging_table, reset_staging_table, copy_rows
+from app.services.upsert import insert_ignoring_conflicts
+
+# Rows per bulk lookup / insert round trip
+IMPORT_CHUNK_SIZE = 1000
+
+# Commit (and refresh customer stats) after roughly this many written rows
+COMMIT_EVERY_ROWS = 50000
+
+# Portaly rows per staging load in COPY mode
+COPY_CHUNK_SIZE = 50000
+
+ACCUPASS_CUSTOMER_FIELDS = ["email", "name", "phone", "industry", "job_title", "age_range"]
+REGISTRATION_FIELDS = ["order_no", "ticket_type", "registration_time", "checked_in"]
+PORTALY_CUSTOMER_FIELDS = ["email", "name", "phone", "job_title"]
+PURCHASE_FIELDS = ["product_name", "order_no", "amount", "payment_method", "purchased_at"]
+
+# COPY mode staging tables; row_no keeps the file order for "first row wins" merges
+ACCUPASS_STAGE = staging_table(
+    "import_stage_accupass",
+    Column("row_no", Integer),
+    Column("email", String(255)),
+    Column("name", String(100)),
+    Column("phone", String(20)),
+    Column("industry", String(100)),
+    Column("job_title", String(100)),
+    Column("age_range", String(20)),
+    Column("order_no", String(50)),
+    Column("ticket_type", String(100)),
+    Column("registration_time", DateTime),
+    Column("checked_in", Boolean),
+)
+PORTALY_PRODUCT_STAGE = staging_table(
+    "import_stage_products",
+    Column("name", String(255)),
+    Column("price", Numeric(10, 2)),
+)
+PORTALY_PURCHASE_STAGE = staging_table(
+    "import_stage_purchases",
+    Column("row_no", Integer),
+    Column("email", String(255)),
+    Column("name", String(100)),
+    Column("phone", String(20)),
+    Column("job_title", String(100)),
+    Column("product_name", String(255)),
+    Column("order_no", String(50)),
+    Column("amount", Numeric(10, 2)),
+    Column("payment_method", String(50)),
+    Column("purchased_at", DateTime),
+)
+
+
+# progress(filename, rows, file_stats, finished) is called as each file or chunk is written
+ProgressCallback = Callable[[str, int, dict, bool], None]
 
 
 class DataImportService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, use_copy: bool = False, progress: Optional[ProgressCallback] = None):
+        """use_copy loads rows with Postgres COPY and set-based merges instead of INSERTs."""
+        if use_copy and db.get_bind().dialect.name != "postgresql":
+            raise ValueError("COPY mode requires PostgreSQL")
         self.db = db
+        self.use_copy = use_copy
+        self.progress = progress
+        # Customers whose registrations or purchases changed in this import
+        self._touched_customer_ids: set = set()
+        # (id, name, email) of customers created since the last commit, for the search index
+        self._new_customers: list[tuple] = []
+
+    def import_accupass_data(
+        self, data_dir: str, workers: Optional[int] = None, force: bool = False, use_manifest: bool = True
+    ) -> dict:
+        """Import all Accupass CSV files from a directory.
+
+        Files are parsed in a process pool while this session writes them one
+        at a time. Each file is written inside its own savepoint, so a bad
+        file is skipped without losing the rest, and work is committed every
+        COMMIT_EVERY_ROWS rows. Files unchanged since their last import are
+        skipped unless force is set. Without use_manifest (e.g. for one-off
+        uploads) the import manifest is neither consulted nor updated.
+        """
+        with import_lock(self.db, "accupass"):
+            return self._import_accupass_files(data_dir, workers, force, use_manifest)
+
+    def _import_accupass_files(
+        self, data_dir: str, workers: Optional[int], force: bool, use_manifest: bool
+    ) -> dict:
+        stats = {
+            "events": 0, "registrations": 0, "customers_created": 0,
+            "skipped_files": 0, "failed_files": [], "unparseable_values": {},
+        }
+
+        manifest = SourceManifest(self.db, "accupass") if use_manifest else None
+        filepaths = []
+        for filename in sorted(os.listdir(data_dir)):
+            if not filename.endswith('.csv'):
+                continue
+            filepath = os.path.join(data_dir, filename)
+            if manifest and not force and manifest.unchanged(filepath):
+                stats["skipped_files"] += 1
+                self._report_progress(filename, 0, {"skipped": True}, finished=True)
+                continue
+            filepaths.append(filepath)
 
-    def import_accupass_data(self, data_dir: str) -> dict:
-        """Import all Accupass CSV files from a directory."""
-        stats = {"events": 0, "registrations": 0, "customers_created": 0}
+        rows_since_commit = 0
+        for filepath, parsed in self._parse_accupass_files(filepaths, workers):
+            if isinstance(parsed, Exception):
+                stats["failed_files"].append((os.path.basename(filepath), str(parsed)))
+                self._report_progress(os.path.basename(filepath), 0, {"error": str(parsed)}, finished=True)
+                continue
 
-        for filename in os.listdir(data_dir):
-            if not filename.endswith('.csv'):
+            new_customers = len(self._new_customers)
+            try:
+                with self.db.begin_nested():
+                    event_stats = self._import_single_event(parsed)
+                    if manifest:
+                        manifest.record(filepath, event_stats["registrations"])
+            except Exception as e:
+                # Customers created by the rolled-back file no longer exist
+                del self._new_customers[new_customers:]
+                stats["failed_files"].append((parsed.filename, str(e)))
+                self._report_progress(parsed.filename, 0, {"error": str(e)}, finished=True)
                 continue
+            if parsed.unparseable:
+                stats["unparseable_values"][parsed.filename] = parsed.unparseable
+                event_stats["unparseable_values"] = parsed.unparseable
+            self._report_progress(parsed.filename, len(parsed.rows), event_stats, finished=True)
 
-            filepath = os.path.join(data_dir, filename)
-            event_stats = self._import_single_event(filepath, filename)
             stats["events"] += 1
             stats["registrations"] += event_stats["registrations"]
             stats["customers_created"] += event_stats["customers_created"]
 
-        self.db.commit()
-        return stats
-
-    def _import_single_event(self, filepath: str, filename: str) -> dict:
-        """Import a single Accupass event CSV."""
-        stats = {"registrations": 0, "customers_created": 0}
+            rows_since_commit += len(parsed.rows)
+            if rows_since_commit >= COMMIT_EVERY_ROWS:
+                self._commit_import()
+                rows_since_commit = 0
 
-        # Extract event name and date from filename
-        event_name, event_date = self._parse_filename(filename)
+        self._commit_import()
+        return stats
 
+    def _parse_accupass_files(
+        self, filepaths: list[str], workers: Optional[int]
+    ) -> Iterator[tuple[str, ParsedEventFile | Exception]]:
+        """Yield (filepath, parsed file or parse error) as parsing completes.
+
+        At most two files per worker are parsed ahead of the writer, which
+        bounds memory regardless of how many files there are.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(filepaths) <= 1:
+            for filepath in filepaths:
+                try:
+                    yield filepath, parse_accupass_file(filepath)
+                except Exception as e:
+                    yield filepath, e
+            return
+
+        pending_paths = iter(filepaths)
+        # Spawned (not forked) workers are safe when called from a threaded server
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            in_flight = {}
+            for filepath in pending_paths:
+                in_flight[pool.submit(parse_accupass_file, filepath)] = filepath
+                if len(in_flight) >= workers * 2:
+                    break
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    filepath = in_flight.pop(future)
+                    next_path = next(pending_paths, None)
+                    if next_path is not None:
+                        in_flight[pool.submit(parse_accupass_file, next_path)] = next_path
+                    try:
+                        yield filepath, future.result()
+                    except Exception as e:
+                        yield filepath, e
+
+    def _import_single_event(self, parsed: ParsedEventFile) -> dict:
+        """Write one parsed Accupass event with bulk lookups and inserts."""
         # Create or get event
-        event = self.db.query(Event).filter(Event.name == event_name).first()
+        event = self.db.query(Event).filter(Event.name == parsed.event_name).first()
         if not event:
-            event = Event(name=event_name, event_date=event_date, source="accupass")
+            event = Event(name=parsed.event_name, event_date=parsed.event_date, source="accupass")
             self.db.add(event)
             self.db.flush()
 
-        # Read CSV (skip first row which contains indices)
-        df = pd.read_csv(filepath, skiprows=1)
-
-        for _, row in df.iterrows():
-            email = str(row.get('參加人Email', '')).strip().lower()
-            if not email or email == 'nan':
-                continue
-
-            # Get or create customer
-            customer = self.db.query(Customer).filter(Customer.email == email).first()
-            if not customer:
-                customer = Customer(
-                    email=email,
-                    name=str(row.get('參加人姓名', '')).strip() or None,
-                    phone=self._clean_phone(row.get('參加人電話')),
-                    industry=str(row.get('產業', '')).strip() or None,
-                    job_title=str(row.get('職稱 & 工作內容', row.get('職稱', ''))).strip() or None,
-                    age_range=str(row.get('年齡', '')).strip() or None,
-                )
-                self.db.add(customer)
-                self.db.flush()
-                stats["customers_created"] += 1
-
-            # Check if registration already exists
-            existing = self.db.query(EventRegistration).filter(
-                EventRegistration.customer_id == customer.id,
-                EventRegistration.event_id == event.id
-            ).first()
-
-            if not existing:
-                registration = EventRegistration(
-                    customer_id=customer.id,
-                    event_id=event.id,
-                    order_no=str(row.get('訂單編號', '')),
-                    ticket_type=str(row.get('票券名稱', '')).strip() or None,
-                    registration_time=self._parse_datetime(row.get('報名時間(GTM+8)')),
-                    checked_in=bool(row.get('驗票次數', 0)),
-                )
-                self.db.add(registration)
-                stats["registrations"] += 1
-
-        return stats
+        df = parsed.rows
+        stats = {"registrations": 0, "customers_created": 0}
+        now = datetime.utcnow()
 
-    def import_portaly_data(self, filepath: str) -> dict:
-        """Import Portaly Excel file."""
-        stats = {"products": 0, "purchases": 0, "customers_created": 0}
+        if self.use_copy:
+            self._copy_single_event(event, df, now, stats)
+            return stats
 
-        df = pd.read_excel(filepath)
+        for start in range(0, len(df), IMPORT_CHUNK_SIZE):
+            chunk = df.iloc[start:start + IMPORT_CHUNK_SIZE]
+            customer_ids = self._resolve_customers(chunk, ACCUPASS_CUSTOMER_FIELDS, now, stats)
+            chunk = chunk.assign(customer_id=chunk["email"].map(customer_ids))
 
-        # Create products from unique project names
-        product_map = {}
-        for project_name in df['專案'].unique():
-            if pd.isna(project_name):
-                continue
-            product = self.db.query(Product).filter(Product.name == project_name).first()
-            if not product:
-                # Get typical price for this product
-                price = float(df[df['專案'] == project_name]['交易金額'].iloc[0])
-                product = Product(name=project_name, price=price)
-                self.db.add(product)
-                self.db.flush()
-                stats["products"] += 1
-            product_map[project_name] = product
-
-        for _, row in df.iterrows():
-            email = str(row.get('E-mail', '')).strip().lower()
-            if not email or email == 'nan':
-                continue
+            records = self._to_records(chunk[["customer_id"] + REGISTRATION_FIELDS])
+            for record in records:
+                record.update(id=uuid.uuid4(), event_id=event.id, created_at=now)
 
-            # Skip non-paid transactions
-            if row.get('交易狀態') != '已入帳':
-                continue
+            # Attendees already registered for this event are skipped by the unique index
+            registrations = EventRegistration.__table__
+            registered = self.db.execute(
+                insert_ignoring_conflicts(self.db, registrations, ["event_id", "customer_id"])
+                .returning(registrations.c.customer_id),
+                records,
+            ).scalars().all()
 
-            # Get or create customer
-            customer = self.db.query(Customer).filter(Customer.email == email).first()
-            if not customer:
-                customer = Customer(
-                    email=email,
-                    name=str(row.get('姓名.1', row.get('姓名', ''))).strip() or None,
-                    phone=self._clean_phone(row.get('電話')),
-                    job_title=str(row.get('職業', '')).strip() or None,
-                )
-                self.db.add(customer)
-                self.db.flush()
-                stats["customers_created"] += 1
-
-            # Create purchase
-            project_name = row.get('專案')
-            if pd.isna(project_name) or project_name not in product_map:
-                continue
-
-            product = product_map[project_name]
-
-            # Check if purchase already exists
-            existing = self.db.query(Purchase).filter(
-                Purchase.order_no == str(row.get('訂單編號', ''))
-            ).first()
-
-            if not existing:
-                amount_val = row.get('交易金額', 0)
-                purchase = Purchase(
-                    customer_id=customer.id,
-                    product_id=product.id,
-                    order_no=str(row.get('訂單編號', '')),
-                    amount=float(amount_val) if not pd.isna(amount_val) else 0,
-                    payment_method=str(row.get('付款方式', '')).strip() or None,
-                    purchased_at=self._parse_datetime(row.get('交易時間')),
-                )
-                self.db.add(purchase)
-                stats["purchases"] += 1
+            self._touched_customer_ids.update(registered)
+            stats["registrations"] += len(registered)
 
-        self.db.commit()
         return stats
 
-    def _parse_filename(self, filename: str) -> tuple[str, Optional[datetime]]:
-        """Extract event name and date from filename."""
-        # Remove .csv extension
-        name = filename.replace('.csv', '')
-
-        # Try to extract date (YYYYMMDD pattern)
-        date_match = re.match(r'^(\d{8})\s*(.+)$', name)
-        if date_match:
-            date_str = date_match.group(1)
-            event_name = date_match.group(2).strip()
-            # Clean up event name
-            event_name = re.sub(r'^參加名單\s*-?\s*', '', event_name).strip()
-            try:
-                event_date = datetime.strptime(date_str, '%Y%m%d').date()
-                return event_name, event_date
-            except ValueError:
-                pass
-
-        return name, None
-
-    def _parse_datetime(self, value) -> Optional[datetime]:
-        """Parse datetime from various formats."""
-        if pd.isna(value):
-            return None
-
-        value_str = str(value).strip()
-        formats = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y/%m/%d %H:%M:%S']
-
-        for fmt in formats:
-            try:
-                return datetime.strptime(value_str, fmt)
-            except ValueError:
-                continue
+    def _resolve_customers(self, chunk: pd.DataFrame, fields: list[str], now: datetime, stats: dict) -> dict:
+        """Map the chunk's emails to customer IDs, bulk-inserting unknown customers."""
+        emails = chunk["email"].tolist()
+        customer_ids = dict(self.db.execute(
+            select(Customer.email, Customer.id).where(Customer.email.in_(emails))
+        ).all())
+
+        new_customers = chunk[~chunk["email"].isin(customer_ids.keys())]
+        if new_customers.empty:
+            return customer_ids
+
+        records = self._to_records(new_customers[fields])
+        for record in records:
+            record.update(id=uuid.uuid4(), created_at=now, updated_at=now)
+        customers = Customer.__table__
+        created = dict(self.db.execute(
+            insert_ignoring_conflicts(self.db, customers, ["email"])
+            .returning(customers.c.email, customers.c.id),
+            records,
+        ).all())
+
+        # Emails inserted by a concurrent writer since the lookup above
+        conflicted = [record["email"] for record in records if record["email"] not in created]
+        if conflicted:
+            customer_ids.update(self.db.execute(
+                select(Customer.email, Customer.id).where(Customer.email.in_(conflicted))
+            ).all())
+
+        for record in records:
+            if record["email"] in created:
+                customer_ids[record["email"]] = record["id"]
+                self._new_customers.append((record["id"], record.get("name"), record["email"]))
+                self._touched_customer_ids.add(record["id"])
+        stats["customers_created"] += len(created)
+        return customer_ids
+
+    def import_portaly_data(self, filepath: str, force: bool = False, use_manifest: bool = True) -> dict:
+        """Import Portaly Excel file.
+
+        The workbook is streamed in chunks; each product is priced from the
+        first row it appears in. An unchanged file is skipped unless force is
+        set, and rows of an appended export whose order numbers were already
+        imported are dropped before any other work. Without use_manifest the
+        import manifest is neither consulted nor updated.
+        """
+        with import_lock(self.db, "portaly"):
+            return self._import_portaly_file(filepath, force, use_manifest)
+
+    def _import_portaly_file(self, filepath: str, force: bool, use_manifest: bool) -> dict:
+        stats = {
+            "products": 0, "purchases": 0, "customers_created": 0,
+            "skipped_files": 0, "unparseable_values": {},
+        }
+        manifest = SourceManifest(self.db, "portaly") if use_manifest else None
+        filename = os.path.basename(filepath)
+        if manifest and not force and manifest.unchanged(filepath):
+            stats["skipped_files"] = 1
+            self.db.commit()
+            self._report_progress(filename, 0, {"skipped": True}, finished=True)
+            return stats
+
+        now = datetime.utcnow()
+        chunk_size = COPY_CHUNK_SIZE if self.use_copy else IMPORT_CHUNK_SIZE
+        product_ids: dict = {}
+        unparseable = UnparseableValues()
+
+        for chunk in iter_portaly_chunks(filepath, chunk_size, unparseable):
+            if self.use_copy:
+                self._copy_portaly_chunk(chunk, now, stats)
+            else:
+                self._import_portaly_chunk(chunk, product_ids, now, stats)
+            stats["unparseable_values"] = unparseable.as_dict()
+            self._report_progress(filename, len(chunk), dict(stats), finished=False)
+
+        if manifest:
+            manifest.record(filepath, stats["purchases"])
+        self._commit_import()
+        self._report_progress(filename, 0, dict(stats), finished=True)
+        return stats
 
-        return None
+    def _import_portaly_chunk(self, chunk: pd.DataFrame, product_ids: dict, now: datetime, stats: dict):
+        """Write one chunk of Portaly transactions with bulk lookups and inserts."""
+        # Orders already imported (by an earlier run or chunk) need no further work;
+        # the unique index on order_no still guards the insert below
+        known_orders = set(self.db.execute(
+            select(Purchase.order_no).where(Purchase.order_no.in_(chunk["order_no"].dropna().tolist()))
+        ).scalars())
+        chunk = chunk[~chunk["order_no"].isin(known_orders)]
+
+        self._resolve_products(chunk, product_ids, now, stats)
+
+        # Only paid transactions create customers and purchases
+        paid = chunk[chunk["paid"] & chunk["email"].notna()]
+        if paid.empty:
+            return
+        customer_ids = self._resolve_customers(
+            paid.drop_duplicates("email"), PORTALY_CUSTOMER_FIELDS, now, stats
+        )
+
+        # Keep the first row of repeated order numbers
+        orders = paid[paid["product_name"].isin(product_ids.keys())]
+        orders = orders[orders["order_no"].isna() | ~orders["order_no"].duplicated()]
+        if orders.empty:
+            return
+
+        orders = orders.assign(
+            customer_id=orders["email"].map(customer_ids),
+            product_id=orders["product_name"].map(product_ids),
+        )
+        records = self._to_records(orders[["customer_id", "product_id"] + PURCHASE_FIELDS[1:]])
+        for record in records:
+            record.update(id=uuid.uuid4(), created_at=now)
+        purchases = Purchase.__table__
+        purchased = self.db.execute(
+            insert_ignoring_conflicts(self.db, purchases, ["order_no"])
+            .returning(purchases.c.customer_id),
+            records,
+        ).scalars().all()
+
+        self._touched_customer_ids.update(purchased)
+        stats["purchases"] += len(purchased)
+
+    def _resolve_products(self, chunk: pd.DataFrame, product_ids: dict, now: datetime, stats: dict):
+        """Add the chunk's products to product_ids, creating unknown ones from their first row."""
+        first_rows = chunk[
+            chunk["product_name"].notna() & ~chunk["product_name"].isin(product_ids.keys())
+        ].drop_duplicates("product_name")
+        if first_rows.empty:
+            return
+
+        # Oldest product wins when names repeat
+        product_ids.update(self.db.execute(
+            select(Product.name, Product.id)
+            .where(Product.name.in_(first_rows["product_name"].tolist()))
+            .order_by(Product.created_at.desc())
+        ).all())
+
+        new_products = first_rows[~first_rows["product_name"].isin(product_ids.keys())]
+        if new_products.empty:
+            return
+        records = [
+            {"id": uuid.uuid4(), "name": name, "price": float(price), "created_at": now}
+            for name, price in zip(new_products["product_name"], new_products["amount"])
+        ]
+        self.db.execute(insert(Product.__table__), records)
+        product_ids.update((record["name"], record["id"]) for record in records)
+        stats["products"] += len(records)
+
+    def _copy_single_event(self, event: Event, df: pd.DataFrame, now: datetime, stats: dict):
+        """COPY one event's rows into staging, then merge customers and registrations."""
+        reset_staging_table(self.db, ACCUPASS_STAGE)
+        copy_rows(self.db, ACCUPASS_STAGE, self._staged_rows(df, ACCUPASS_CUSTOMER_FIELDS + REGISTRATION_FIELDS))
+        stats["customers_created"] += self._merge_staged_customers(
+            ACCUPASS_STAGE, ACCUPASS_CUSTOMER_FIELDS, now
+        )
+
+        stage = ACCUPASS_STAGE.c
+        registrations = EventRegistration.__table__
+        new_registrations = (
+            select(
+                func.gen_random_uuid(),
+                Customer.id,
+                literal(event.id, registrations.c.event_id.type),
+                stage.order_no,
+                stage.ticket_type,
+                stage.registration_time,
+                stage.checked_in,
+                literal(now),
+            )
+            .select_from(ACCUPASS_STAGE.join(Customer.__table__, Customer.email == stage.email))
+        )
+        customer_ids = self.db.execute(
+            insert_ignoring_conflicts(self.db, registrations, ["event_id", "customer_id"])
+            .from_select(
+                ["id", "customer_id", "event_id"] + REGISTRATION_FIELDS + ["created_at"],
+                new_registrations,
+            )
+            .returning(registrations.c.customer_id)
+        ).scalars().all()
+
+        self._touched_customer_ids.update(customer_ids)
+        stats["registrations"] += len(customer_ids)
+
+    def _copy_portaly_chunk(self, chunk: pd.DataFrame, now: datetime, stats: dict):
+        """COPY one chunk of Portaly products and paid transactions into staging, then merge."""
+        # Products from earlier chunks already exist, so this is each new product's first row
+        products = chunk[chunk["product_name"].notna()].drop_duplicates("product_name")
+        reset_staging_table(self.db, PORTALY_PRODUCT_STAGE)
+        copy_rows(
+            self.db, PORTALY_PRODUCT_STAGE,
+            self._to_frame_rows(products[["product_name", "amount"]])
+        )
+        product_stage = PORTALY_PRODUCT_STAGE.c
+        new_products = (
+            select(func.gen_random_uuid(), product_stage.name, product_stage.price, literal(now))
+            .where(~exists().where(Product.name == product_stage.name))
+        )
+        stats["products"] += len(self.db.execute(
+            insert(Product.__table__)
+            .from_select(["id", "name", "price", "created_at"], new_products)
+            .returning(Product.__table__.c.id)
+        ).all())
+
+        paid = chunk[chunk["paid"] & chunk["email"].notna()]
+        reset_staging_table(self.db, PORTALY_PURCHASE_STAGE)
+        copy_rows(self.db, PORTALY_PURCHASE_STAGE, self._staged_rows(paid, PORTALY_CUSTOMER_FIELDS + PURCHASE_FIELDS))
+        stats["customers_created"] += self._merge_staged_customers(
+            PORTALY_PURCHASE_STAGE, PORTALY_CUSTOMER_FIELDS, now
+        )
+
+        # First row per order, matched to the oldest product with its name
+        stage = PORTALY_PURCHASE_STAGE.c
+        orders = (
+            select(PORTALY_PURCHASE_STAGE)
+            .where(stage.product_name.isnot(None))
+            .distinct(stage.order_no)
+            .order_by(stage.order_no, stage.row_no)
+            .subquery()
+        )
+        product_ids = (
+            select(Product.id, Product.name)
+            .distinct(Product.name)
+            .order_by(Product.name, Product.created_at)
+            .subquery()
+        )
+        purchases = Purchase.__table__
+        new_purchases = (
+            select(
+                func.gen_random_uuid(),
+                Customer.id,
+                product_ids.c.id,
+                orders.c.order_no,
+                orders.c.amount,
+                orders.c.payment_method,
+                orders.c.purchased_at,
+                literal(now),
+            )
+            .select_from(
+                orders
+                .join(Customer.__table__, Customer.email == orders.c.email)
+                .join(product_ids, product_ids.c.name == orders.c.product_name)
+            )
+        )
+        customer_ids = self.db.execute(
+            insert_ignoring_conflicts(self.db, purchases, ["order_no"])
+            .from_select(
+                ["id", "customer_id", "product_id", "order_no", "amount",
+                 "payment_method", "purchased_at", "created_at"],
+                new_purchases,
+            )
+            .returning(purchases.c.customer_id)
+        ).scalars().all()
+
+        self._touched_customer_ids.update(customer_ids)
+        stats["purchases"] += len(customer_ids)
+
+    def _merge_staged_customers(self, stage, fields: list[str], now: datetime) -> int:
+        """Insert customers for staged emails not yet in the table; first row per email wins."""
+        first_rows = (
+            select(*(stage.c[field] for field in fields))
+            .distinct(stage.c.email)
+            .order_by(stage.c.email, stage.c.row_no)
+            .subquery()
+        )
+        new_customers = (
+            select(
+                func.gen_random_uuid(),
+                *(first_rows.c[field] for field in fields),
+                literal(now),
+                literal(now),
+            )
+        )
+        customers = Customer.__table__
+        created = self.db.execute(
+            insert_ignoring_conflicts(self.db, customers, ["email"])
+            .from_select(["id"] + fields + ["created_at", "updated_at"], new_customers)
+            .returning(customers.c.id, customers.c.name, customers.c.email)
+        ).all()
+
+        for customer_id, name, email in created:
+            self._new_customers.append((customer_id, name, email))
+            self._touched_customer_ids.add(customer_id)
+        return len(created)
+
+    def _report_progress(self, filename: str, rows: int, file_stats: dict, finished: bool):
+        if self.progress:
+            self.progress(filename, rows, file_stats, finished)
+
+    def _commit_import(self):
+        """Refresh derived data for touched customers, invalidate caches and commit.
+
+        New customers reach the in-process search index only once committed.
+        """
+        self.db.flush()
+        CustomerStatsService(self.db).refresh(self._touched_customer_ids)
+        self._touched_customer_ids.clear()
+        bump_data_generation(self.db)
+        generation = get_data_generation(self.db)
+        self.db.commit()
+        customer_search_index.add_committed(self._new_customers, generation)
+        self._new_customers = []
 
-    def _clean_phone(self, value) -> Optional[str]:
-        """Clean phone number."""
-        if pd.isna(value):
-            return None
+    def _staged_rows(self, frame: pd.DataFrame, fields: list[str]):
+        """Rows for a staging table: row_no followed by fields, NaN/NaT as None."""
+        frame = frame[fields].reset_index(drop=True)
+        return self._to_frame_rows(frame.reset_index(names="row_no"))
 
-        phone = str(value).strip()
-        # Remove .0 from float conversion
-        if phone.endswith('.0'):
-            phone = phone[:-2]
+    def _to_frame_rows(self, frame: pd.DataFrame):
+        return frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
 
-        return phone if phone and phone != 'nan' else None
+    def _to_records(self, frame: pd.DataFrame) -> list[dict]:
+        """DataFrame rows as dicts with NaN/NaT converted to None."""
+        return frame.astype(object).where(frame.notna(), None).to_dict("records")
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from typing import Dict, List
+from uuid import UUID
+from sqlalchemy import func, insert, literal, select, true, update
+from sqlalchemy.orm import Query, Session
+
+from app.models import Customer
+from app.models.email_campaign import EmailCampaign
+from app.models.email_log import EmailLog, EmailStatus
+from app.models.email_outbox import EmailOutbox, OutboxStatus
+from app.services.bulk_update import bulk_update
+from app.services.upsert import insert_ignoring_conflicts
+
+# 認領的收件人超過此時間仍未寫回結果，視為發送程序已中斷
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+INTERRUPTED_ERROR = "發送中斷，無法確認是否已寄出"
+
+outbox = EmailOutbox.__table__
+campaigns = EmailCampaign.__table__
+
+
+class CampaignOutbox:
+    """單一活動的待發送佇列
+
+    發送開始時為每位收件人寫入一列，發送執行緒以 FOR UPDATE SKIP LOCKED 分批認領
+    （PENDING → SENDING）並同時建立 EmailLog，寄出後寫回 SENT / FAILED。程序中斷後可從剩下的 PENDING
+    繼續；認領後逾時未完成的列無法確認是否已寄出，一律記為失敗而不重寄，
+    確保每位收件人最多只會收到一封。
+    """
+
+    def __init__(self, db: Session, campaign_id: UUID):
+        self.db = db
+        self.campaign_id = campaign_id
+
+    def fill(self, recipients: Query) -> int:
+        """將收件人查詢結果寫入佇列（已存在的收件人略過），回傳新增筆數"""
+        rows = recipients.with_entities(
+            literal(self.campaign_id, outbox.c.campaign_id.type),
+            Customer.id,
+            Customer.email,
+            Customer.name,
+            literal(OutboxStatus.PENDING, outbox.c.status.type),
+            literal(datetime.utcnow(), outbox.c.created_at.type),
+        ).order_by(None).filter(true())  # SQLite 的 INSERT ... SELECT ... ON CONFLICT 需要 WHERE 子句
+        stmt = insert_ignoring_conflicts(
+            self.db, outbox, ["campaign_id", "customer_id"]
+        ).from_select(
+            ["campaign_id", "customer_id", "recipient_email", "recipient_name", "status", "created_at"],
+            rows.statement,
+        )
+        return self.db.execute(stmt).rowcount
+
+    def claim(self, limit: int) -> list:
+        """認領最多 limit 位待發送的收件人，回傳 (customer_id, email, name)"""
+        pending = (
+            select(outbox.c.customer_id)
+            .where(outbox.c.campaign_id == self.campaign_id, outbox.c.status == OutboxStatus.PENDING)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(outbox)
+            .where(
+                outbox.c.campaign_id == self.campaign_id,
+                outbox.c.customer_id.in_(pending),
+                outbox.c.status == OutboxStatus.PENDING,
+            )
+            .values(status=OutboxStatus.SENDING, claimed_at=datetime.utcnow())
+            .returning(outbox.c.customer_id, outbox.c.recipient_email, outbox.c.recipient_name)
+        )
+        return self.db.execute(stmt).all()
+
+    def insert_logs(self, logs: List[dict]):
+        """為剛認領的收件人一次寫入待發送（PENDING）的 EmailLog"""
+        if logs:
+            self.db.execute(insert(EmailLog.__table__), logs)
+
+    def complete(self, results: List[dict]):
+        """寫回一批發送結果：EmailLog 狀態、佇列狀態與活動計數
+
+        results 每筆含 id（EmailLog）、customer_id、status、gmail_message_id、error_message、sent_at。
+        """
+        if not results:
+            return
+        now = datetime.utcnow()
+        bulk_update(self.db, EmailLog.__table__, [
+            {
+                "id": r["id"],
+                "status": r["status"],
+                "gmail_message_id": r["gmail_message_id"],
+                "error_message": r["error_message"],
+                "sent_at": r["sent_at"],
+            }
+            for r in results
+        ])
+
+        sent = [r["customer_id"] for r in results if r["status"] == EmailStatus.SENT]
+        failed = [r["customer_id"] for r in results if r["status"] != EmailStatus.SENT]
+        for status, customer_ids in ((OutboxStatus.SENT, sent), (OutboxStatus.FAILED, failed)):
+            if customer_ids:
+                self.db.execute(
+                    update(outbox)
+                    .where(outbox.c.campaign_id == self.campaign_id, outbox.c.customer_id.in_(customer_ids))
+                    .values(status=status, processed_at=now)
+                )
+        self._add_counts(len(sent), len(failed))
+
+    def fail_interrupted(self) -> int:
+        """將認領逾時的收件人（及其 EmailLog）記為失敗，回傳筆數"""
+        cutoff = datetime.utcnow() - CLAIM_TIMEOUT
+        stale = self.db.execute(
+            update(outbox)
+            .where(
+                outbox.c.campaign_id == self.campaign_id,
+                outbox.c.status == OutboxStatus.SENDING,
+                outbox.c.claimed_at < cutoff,
+            )
+            .values(status=OutboxStatus.FAILED, error_message=INTERRUPTED_ERROR, processed_at=datetime.utcnow())
+            .returning(outbox.c.customer_id)
+        ).scalars().all()
+        if stale:
+            logs = EmailLog.__table__
+            self.db.execute(
+                update(logs)
+                .where(
+                    logs.c.campaign_id == self.campaign_id,
+                    logs.c.customer_id.in_(stale),
+                    logs.c.status == EmailStatus.PENDING,
+                )
+                .values(status=EmailStatus.FAILED, error_message=INTERRUPTED_ERROR)
+            )
+            self._add_counts(0, len(stale))
+        return len(stale)
+
+    def counts(self) -> Dict[OutboxStatus, int]:
+        """各狀態的收件人數"""
+        rows = self.db.execute(
+            select(outbox.c.status, func.count())
+            .where(outbox.c.campaign_id == self.campaign_id)
+            .group_by(outbox.c.status)
+        ).all()
+        counts = {status: 0 for status in OutboxStatus}
+        counts.update(dict(rows))
+        return counts
+
+    def _add_counts(self, sent: int, failed: int):
+        # updated_at 隨之更新，作為發送程序仍在運作的心跳
+        self.db.execute(
+            update(campaigns)
+            .where(campaigns.c.id == self.campaign_id)
+            .values(
+                sent_count=campaigns.c.sent_count + sent,
+                failed_count=campaigns.c.failed_count + failed,
+            )
+        )
@@ -1,101 +1,115 @@
 import json
-import secrets
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from uuid import UUID
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import and_, false, func
 
-from app.models import Customer, Purchase, EventRegistration
+from app.models import Customer, CustomerStats
 from app.models.email_campaign import EmailCampaign, CampaignStatus, RecipientFilter
 from app.models.email_log import EmailLog, EmailStatus
+from app.models.email_outbox import OutboxStatus
+from app.services.cache import GenerationCache
+from app.services.campaign_sender import CampaignContent, CampaignSender, Recipient, delivering
+from app.services.customer_stats import activity_filters
+from app.services.email_outbox import CLAIM_TIMEOUT, CampaignOutbox
 from app.services.gmail_service import gmail_service
+from app.services.pagination import apply_keyset
 from app.templates.email_templates import render_template, get_template, get_all_templates
 
-# Tracking pixel base URL (應從環境變數讀取)
-TRACKING_BASE_URL = "http://localhost:8000"
+# 串流讀取收件人時，每次從伺服器端游標取回的筆數
+RECIPIENT_FETCH_SIZE = 1000
+
+# 各篩選條件的收件人數量與預覽，快取到下次資料匯入（data generation 遞增）為止
+recipient_cache = GenerationCache()
 
 
 class EmailService:
     def __init__(self, db: Session):
         self.db = db
 
-    def _generate_pixel_token(self) -> str:
-        """產生唯一的追蹤 token"""
-        return secrets.token_urlsafe(32)
-
-    def _insert_tracking_pixel(self, html_content: str, pixel_token: str) -> str:
-        """在 HTML 內容中插入追蹤像素"""
-        tracking_pixel = f'<img src="{TRACKING_BASE_URL}/api/email/track/{pixel_token}.png" width="1" height="1" style="display:none;" alt="" />'
-        # 在 </body> 前插入，若無則插入到最後
-        if "</body>" in html_content:
-            return html_content.replace("</body>", f"{tracking_pixel}</body>")
-        return html_content + tracking_pixel
-
-    def get_recipients_by_filter(
-        self, recipient_filter: RecipientFilter
-    ) -> List[Customer]:
-        """根據篩選條件取得收件人列表"""
+    def _recipients_query(self, recipient_filter: RecipientFilter) -> Query:
+        """根據篩選條件建立收件人查詢（依 customer_stats 彙總表篩選）"""
         query = self.db.query(Customer)
 
         if recipient_filter == RecipientFilter.ALL:
-            return query.all()
+            return query
 
         elif recipient_filter == RecipientFilter.PURCHASED:
             # 有購買紀錄的顧客
-            purchased_customer_ids = (
-                self.db.query(Purchase.customer_id).distinct().subquery()
+            return query.join(CustomerStats).filter(
+                *activity_filters(has_purchased=True)
             )
-            return query.filter(Customer.id.in_(purchased_customer_ids)).all()
 
         elif recipient_filter == RecipientFilter.EVENT_ATTENDED:
             # 有參加活動的顧客
-            attended_customer_ids = (
-                self.db.query(EventRegistration.customer_id).distinct().subquery()
+            return query.join(CustomerStats).filter(
+                *activity_filters(has_events=True)
             )
-            return query.filter(Customer.id.in_(attended_customer_ids)).all()
 
         elif recipient_filter == RecipientFilter.NOT_PURCHASED:
-            # 沒有購買紀錄的顧客
-            purchased_customer_ids = (
-                self.db.query(Purchase.customer_id).distinct().subquery()
+            # 沒有購買紀錄的顧客（無彙總資料者視為未購買）
+            return query.outerjoin(CustomerStats).filter(
+                *activity_filters(has_purchased=False)
             )
-            return query.filter(~Customer.id.in_(purchased_customer_ids)).all()
 
-        return []
+        return query.filter(false())
+
+    def _stream_recipients(self, query: Query) -> Iterator[Recipient]:
+        """以伺服器端游標串流收件人，只讀取 id / email / name，不建立 ORM 物件"""
+        rows = query.with_entities(
+            Customer.id, Customer.email, Customer.name
+        ).execution_options(stream_results=True).yield_per(RECIPIENT_FETCH_SIZE)
+        for customer_id, email, name in rows:
+            yield Recipient(customer_id, email, name)
 
-    def get_recipients_by_ids(self, recipient_ids: List[str]) -> List[Customer]:
-        """根據 ID 列表取得收件人"""
-        if not recipient_ids:
-            return []
+    def get_recipients_by_filter(
+        self, recipient_filter: RecipientFilter
+    ) -> Iterator[Recipient]:
+        """根據篩選條件串流取得收件人"""
+        return self._stream_recipients(self._recipients_query(recipient_filter))
+
+    def get_recipients_by_ids(self, recipient_ids: List[str]) -> Iterator[Recipient]:
+        """根據 ID 列表串流取得收件人"""
         uuids = [UUID(rid) for rid in recipient_ids]
-        return self.db.query(Customer).filter(Customer.id.in_(uuids)).all()
+        return self._stream_recipients(
+            self.db.query(Customer).filter(Customer.id.in_(uuids))
+        )
 
-    def get_campaign_recipients(self, campaign: EmailCampaign) -> List[Customer]:
-        """根據活動設定取得收件人"""
+    def _campaign_recipients_query(self, campaign: EmailCampaign) -> Query:
+        """根據活動設定建立收件人查詢（支援篩選或手動模式）"""
         if campaign.recipient_mode == "manual" and campaign.recipient_ids:
             try:
                 ids = json.loads(campaign.recipient_ids)
-                return self.get_recipients_by_ids(ids)
             except json.JSONDecodeError:
-                return []
-        return self.get_recipients_by_filter(campaign.recipient_filter)
+                return self.db.query(Customer).filter(false())
+            uuids = [UUID(rid) for rid in ids]
+            return self.db.query(Customer).filter(Customer.id.in_(uuids))
+        return self._recipients_query(campaign.recipient_filter)
+
+    def get_campaign_recipients(self, campaign: EmailCampaign) -> Iterator[Recipient]:
+        """根據活動設定串流取得收件人"""
+        return self._stream_recipients(self._campaign_recipients_query(campaign))
 
+    @recipient_cache.cached
     def get_recipients_count(self, recipient_filter: RecipientFilter) -> int:
-        """取得收件人數量"""
-        return len(self.get_recipients_by_filter(recipient_filter))
+        """取得收件人數量（SQL COUNT）"""
+        return self._recipients_query(recipient_filter).with_entities(
+            func.count(Customer.id)
+        ).scalar()
 
+    @recipient_cache.cached
     def get_recipients_preview(
         self, recipient_filter: RecipientFilter, limit: int = 10
     ) -> dict:
-        """預覽收件人列表"""
-        recipients = self.get_recipients_by_filter(recipient_filter)
-        total_count = len(recipients)
-        sample = recipients[:limit]
+        """預覽收件人列表（數量以 COUNT、樣本以 LIMIT 查詢）"""
+        sample = self._recipients_query(recipient_filter).with_entities(
+            Customer.id, Customer.name, Customer.email
+        ).limit(limit).all()
 
         return {
             "filter": recipient_filter,
-            "total_count": total_count,
+            "total_count": self.get_recipients_count(recipient_filter),
             "sample_recipients": [
                 {
                     "id": str(r.id),
@@ -179,80 +193,76 @@ class EmailService:
         if not gmail_service.is_authenticated():
             return {"success": False, "error": "Gmail 尚未授權"}
 
-        # 更新狀態為發送中
+        # 更新狀態為發送中，並為每位收件人寫入待發送佇列
+        # （重新發送失敗的活動時，已處理過的收件人不會重寄）
         campaign.status = CampaignStatus.SENDING
         campaign.started_at = datetime.utcnow()
+        outbox = CampaignOutbox(self.db, campaign.id)
+        outbox.fill(self._campaign_recipients_query(campaign))
+        campaign.total_recipients = sum(outbox.counts().values())
         self.db.commit()
 
-        # 取得收件人（支援篩選或手動模式）
-        recipients = self.get_campaign_recipients(campaign)
-
-        sent_count = 0
-        failed_count = 0
+        return self._deliver(campaign)
 
-        for customer in recipients:
-            # 產生追蹤 token
-            pixel_token = self._generate_pixel_token()
+    def resume_interrupted_campaigns(self) -> dict:
+        """接手中斷的發送中活動（超過 CLAIM_TIMEOUT 沒有進度），從待發送佇列繼續發送"""
+        if not gmail_service.is_authenticated():
+            return {}
 
-            # 個人化內容
-            subject = campaign.subject.replace("{customer_name}", customer.name or "親愛的顧客")
-            html_content = campaign.content_html.replace(
-                "{customer_name}", customer.name or "親愛的顧客"
-            )
-            # 插入追蹤像素
-            html_content = self._insert_tracking_pixel(html_content, pixel_token)
-
-            text_content = None
-            if campaign.content_text:
-                text_content = campaign.content_text.replace(
-                    "{customer_name}", customer.name or "親愛的顧客"
-                )
-
-            # 建立發送紀錄（含追蹤 token）
-            email_log = EmailLog(
-                campaign_id=campaign.id,
-                customer_id=customer.id,
-                recipient_email=customer.email,
-                recipient_name=customer.name,
-                subject=subject,
-                pixel_token=pixel_token,
+        cutoff = datetime.utcnow() - CLAIM_TIMEOUT
+        campaign_ids = [
+            campaign_id for (campaign_id,) in self.db.query(EmailCampaign.id).filter(
+                EmailCampaign.status == CampaignStatus.SENDING,
+                EmailCampaign.updated_at < cutoff,
             )
-            self.db.add(email_log)
+        ]
+
+        results = {}
+        for campaign_id in campaign_ids:
+            # 以條件更新取得接手權，避免多個程序同時接手同一活動
+            taken = self.db.query(EmailCampaign).filter(
+                EmailCampaign.id == campaign_id,
+                EmailCampaign.status == CampaignStatus.SENDING,
+                EmailCampaign.updated_at < cutoff,
+            ).update({EmailCampaign.updated_at: datetime.utcnow()}, synchronize_session=False)
             self.db.commit()
-
-            # 發送郵件
-            success, message_id, error = gmail_service.send_email(
-                to_email=customer.email,
-                subject=subject,
-                html_content=html_content,
-                text_content=text_content,
-            )
-
-            # 更新發送紀錄
-            if success:
-                email_log.status = EmailStatus.SENT
-                email_log.gmail_message_id = message_id
-                email_log.sent_at = datetime.utcnow()
-                sent_count += 1
-            else:
-                email_log.status = EmailStatus.FAILED
-                email_log.error_message = error
-                failed_count += 1
-
+            if taken:
+                results[campaign_id] = self._deliver(self.get_campaign(campaign_id))
+        return results
+
+    def _deliver(self, campaign: EmailCampaign) -> dict:
+        """發送活動待發送佇列中的收件人，佇列清空後將活動標記為完成"""
+        with delivering(campaign.id) as acquired:
+            if not acquired:
+                return {"success": False, "error": "活動正在發送中"}
+
+            outbox = CampaignOutbox(self.db, campaign.id)
+            outbox.fail_interrupted()
             self.db.commit()
 
-        # 更新活動狀態
-        campaign.sent_count = sent_count
-        campaign.failed_count = failed_count
-        campaign.status = CampaignStatus.COMPLETED
-        campaign.completed_at = datetime.utcnow()
+            sender = CampaignSender(CampaignContent.from_campaign(campaign))
+            completed = sender.run()
+
+        # 重新讀取發送執行緒寫入的計數
+        self.db.refresh(campaign)
+        counts = outbox.counts()
+        if not completed:
+            campaign.status = CampaignStatus.FAILED
+            campaign.completed_at = datetime.utcnow()
+        elif counts[OutboxStatus.PENDING] == 0 and counts[OutboxStatus.SENDING] == 0:
+            campaign.status = CampaignStatus.COMPLETED
+            campaign.completed_at = datetime.utcnow()
+        # 其他程序仍有認領中的收件人時維持發送中，由其完成後更新狀態
         self.db.commit()
 
+        if not completed:
+            return {"success": False, "error": sender.error}
+
         return {
             "success": True,
-            "sent_count": sent_count,
-            "failed_count": failed_count,
-            "total": len(recipients),
+            "sent_count": campaign.sent_count,
+            "failed_count": campaign.failed_count,
+            "total": sum(counts.values()),
         }
 
     def send_test_email(
@@ -279,13 +289,20 @@ class EmailService:
             return {"success": False, "error": error}
 
     def get_email_logs(
-        self, campaign_id: Optional[UUID] = None, skip: int = 0, limit: int = 100
+        self,
+        campaign_id: Optional[UUID] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[EmailLog]:
-        """取得發送紀錄"""
+        """取得發送紀錄（依 created_at, id 由新到舊；有 cursor 時忽略 skip）"""
         query = self.db.query(EmailLog)
         if campaign_id:
             query = query.filter(EmailLog.campaign_id == campaign_id)
-        return query.order_by(EmailLog.created_at.desc()).offset(skip).limit(limit).all()
+        query = apply_keyset(query, EmailLog.created_at, EmailLog.id, cursor, descending=True)
+        if not cursor:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     def record_email_open(self, pixel_token: str) -> bool:
         """記錄郵件開啟"""
@@ -1,10 +1,14 @@
 import os
 import base64
 import json
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
+import httplib2
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -24,12 +28,115 @@ SCOPES = [
     "https://www.googleapis.com/auth/gmail.readonly",
 ]
 
+# Gmail API 連線逾時（秒）
+GMAIL_HTTP_TIMEOUT = 60
+
+# Gmail 每個 HTTP batch 最多 100 個請求
+MAX_BATCH_SIZE = 100
+
+# batch 中被限流（429 / 403 rateLimitExceeded）或 5xx 的子請求，退避後重試的次數
+BATCH_MAX_RETRIES = 3
+BATCH_RETRY_BACKOFF = 1.0
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+# (成功, message_id, 錯誤訊息)
+SendResult = Tuple[bool, Optional[str], Optional[str]]
+
+
+class PreparedEmail(NamedTuple):
+    to_email: str
+    subject: str
+    html_content: str
+    text_content: Optional[str] = None
+
+
+def _build_raw_message(email: PreparedEmail) -> str:
+    """建立 MIME 郵件並編碼為 Gmail API 的 raw 格式"""
+    message = MIMEMultipart("alternative")
+    message["to"] = email.to_email
+    message["subject"] = email.subject
+
+    # 加入純文字版本
+    if email.text_content:
+        text_part = MIMEText(email.text_content, "plain", "utf-8")
+        message.attach(text_part)
+
+    # 加入 HTML 版本
+    html_part = MIMEText(email.html_content, "html", "utf-8")
+    message.attach(html_part)
+
+    return base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+
+
+def _send_error(e: Exception) -> str:
+    if isinstance(e, HttpError):
+        return f"發送失敗: {e.reason if hasattr(e, 'reason') else str(e)}"
+    return f"發送失敗: {str(e)}"
+
+
+def _is_retryable(e: Exception) -> bool:
+    """子請求是否因限流或暫時性錯誤失敗"""
+    if not isinstance(e, HttpError):
+        return False
+    if e.status_code in RETRYABLE_STATUSES:
+        return True
+    if e.status_code == 403:
+        details = e.error_details if isinstance(e.error_details, list) else []
+        return any(
+            isinstance(d, dict) and d.get("reason") in RATE_LIMIT_REASONS for d in details
+        )
+    return False
+
+
+class GmailClient(NamedTuple):
+    """共用的 API resource 與目前執行緒的授權連線"""
+    service: object
+    users: object
+    messages: object
+    http: AuthorizedHttp
+
 
 class GmailService:
     def __init__(self):
         self.credentials: Optional[Credentials] = None
+        # API client 只依內附的 discovery 文件建立一次；httplib2 連線不是執行緒安全的，
+        # 所以每個執行緒各自保有一條授權連線，憑證變更（版本號遞增）後才重建
+        self._client_lock = threading.Lock()
+        self._resources = None
+        self._credentials_version = 0
+        self._local = threading.local()
         self._load_credentials()
 
+    def _set_credentials(self, credentials: Optional[Credentials]):
+        with self._client_lock:
+            self.credentials = credentials
+            self._credentials_version += 1
+
+    def _client(self) -> GmailClient:
+        """取得共用的 Gmail API client 與目前執行緒的授權 HTTP 連線
+
+        client 建立時不綁定連線，執行請求時一律傳入 http=。users() / messages()
+        每次呼叫都會重新產生 resource（約 1ms），因此一併快取。
+        """
+        with self._client_lock:
+            if self._resources is None:
+                service = build("gmail", "v1", http=httplib2.Http(), static_discovery=True)
+                users = service.users()
+                self._resources = (service, users, users.messages())
+            resources = self._resources
+            version = self._credentials_version
+            credentials = self.credentials
+
+        local = self._local
+        if getattr(local, "version", None) != version:
+            local.http = AuthorizedHttp(
+                credentials, http=httplib2.Http(timeout=GMAIL_HTTP_TIMEOUT)
+            )
+            local.version = version
+        return GmailClient(*resources, local.http)
+
     def _get_client_config(self) -> dict:
         """取得 OAuth 客戶端設定"""
         return {
@@ -48,17 +155,17 @@ class GmailService:
             try:
                 with open(GMAIL_TOKEN_PATH, "r") as f:
                     token_data = json.load(f)
-                self.credentials = Credentials(
+                self._set_credentials(Credentials(
                     token=token_data.get("token"),
                     refresh_token=token_data.get("refresh_token"),
                     token_uri=token_data.get("token_uri"),
                     client_id=token_data.get("client_id"),
                     client_secret=token_data.get("client_secret"),
                     scopes=token_data.get("scopes"),
-                )
+                ))
             except Exception as e:
                 print(f"載入憑證失敗: {e}")
-                self.credentials = None
+                self._set_credentials(None)
 
     def _save_credentials(self):
         """儲存憑證到檔案"""
@@ -106,7 +213,7 @@ class GmailService:
                 redirect_uri=GOOGLE_REDIRECT_URI,
             )
             flow.fetch_token(authorization_response=authorization_response)
-            self.credentials = flow.credentials
+            self._set_credentials(flow.credentials)
             self._save_credentials()
             return True
         except Exception as e:
@@ -118,7 +225,7 @@ class GmailService:
         try:
             if os.path.exists(GMAIL_TOKEN_PATH):
                 os.remove(GMAIL_TOKEN_PATH)
-            self.credentials = None
+            self._set_credentials(None)
             return True
         except Exception as e:
             print(f"撤銷授權失敗: {e}")
@@ -129,8 +236,8 @@ class GmailService:
         if not self.is_authenticated():
             return None
         try:
-            service = build("gmail", "v1", credentials=self.credentials)
-            profile = service.users().getProfile(userId="me").execute()
+            client = self._client()
+            profile = client.users.getProfile(userId="me").execute(http=client.http)
             return profile.get("emailAddress")
         except HttpError as e:
             print(f"取得用戶信箱失敗: {e}")
@@ -153,40 +260,86 @@ class GmailService:
             return False, None, "Gmail 尚未授權"
 
         try:
-            service = build("gmail", "v1", credentials=self.credentials)
-
-            # 建立 MIME 郵件
-            message = MIMEMultipart("alternative")
-            message["to"] = to_email
-            message["subject"] = subject
-
-            # 加入純文字版本
-            if text_content:
-                text_part = MIMEText(text_content, "plain", "utf-8")
-                message.attach(text_part)
-
-            # 加入 HTML 版本
-            html_part = MIMEText(html_content, "html", "utf-8")
-            message.attach(html_part)
-
-            # 編碼郵件
-            raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+            client = self._client()
+            raw_message = _build_raw_message(
+                PreparedEmail(to_email, subject, html_content, text_content)
+            )
 
             # 發送
             sent_message = (
-                service.users()
-                .messages()
+                client.messages
                 .send(userId="me", body={"raw": raw_message})
-                .execute()
+                .execute(http=client.http)
             )
 
             return True, sent_message.get("id"), None
 
-        except HttpError as e:
-            error_msg = f"發送失敗: {e.reason if hasattr(e, 'reason') else str(e)}"
-            return False, None, error_msg
         except Exception as e:
-            return False, None, f"發送失敗: {str(e)}"
+            return False, None, _send_error(e)
+
+    def send_batch(self, emails: List[PreparedEmail]) -> List[SendResult]:
+        """
+        以 HTTP batch 發送多封郵件，每個 batch 最多 MAX_BATCH_SIZE 封
+
+        單封失敗不影響同批其他郵件；被限流或 5xx 的子請求會退避後重試。
+
+        Returns:
+            List[SendResult]: 與 emails 順序一致的 (成功, message_id, 錯誤訊息)
+        """
+        if not self.is_authenticated():
+            return [(False, None, "Gmail 尚未授權")] * len(emails)
+
+        results: List[Optional[SendResult]] = [None] * len(emails)
+        try:
+            client = self._client()
+        except Exception as e:
+            return [(False, None, _send_error(e))] * len(emails)
+
+        for start in range(0, len(emails), MAX_BATCH_SIZE):
+            indexes = range(start, min(start + MAX_BATCH_SIZE, len(emails)))
+            self._execute_batch(client, emails, indexes, results)
+        return results
+
+    def _execute_batch(self, client: GmailClient, emails, indexes, results):
+        """執行一個 batch，結果依 request_id（即 emails 的索引）寫回 results"""
+        pending = list(indexes)
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            retry: List[int] = []
+
+            def on_response(request_id, response, exception):
+                index = int(request_id)
+                if exception is None:
+                    results[index] = (True, response.get("id"), None)
+                elif attempt < BATCH_MAX_RETRIES and _is_retryable(exception):
+                    retry.append(index)
+                else:
+                    results[index] = (False, None, _send_error(exception))
+
+            batch = client.service.new_batch_http_request(callback=on_response)
+            for index in pending:
+                try:
+                    raw_message = _build_raw_message(emails[index])
+                except Exception as e:
+                    results[index] = (False, None, _send_error(e))
+                    continue
+                batch.add(
+                    client.messages.send(userId="me", body={"raw": raw_message}),
+                    request_id=str(index),
+                )
+
+            try:
+                batch.execute(http=client.http)
+            except Exception as e:
+                # 整個 batch 失敗（例如連線中斷），尚無結果的郵件一律記為失敗
+                for index in pending:
+                    if results[index] is None:
+                        results[index] = (False, None, _send_error(e))
+                return
+
+            if not retry:
+                return
+            pending = sorted(retry)
+            time.sleep(BATCH_RETRY_BACKOFF * 2 ** attempt)
 
 
 # 全域實例
@@ -0,0 +1,212 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from app.config import IMPORT_DATA_DIR, IMPORT_UPLOAD_DIR
+from app.database import SessionLocal, engine
+from app.services.data_import import DataImportService
+from app.services.import_parsing import count_source_rows
+
+SOURCES = ("accupass", "portaly")
+
+# Finished jobs kept for the status endpoint
+MAX_FINISHED_JOBS = 100
+
+
+class ImportJob:
+    """State of one background import, updated by DataImportService's progress callback."""
+
+    def __init__(
+        self, source: str, path: str, force: bool, use_copy: bool,
+        upload_dir: Optional[str] = None, name: Optional[str] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.path = path
+        # Shown instead of path, e.g. the original name of an uploaded file
+        self.name = name or path
+        self.force = force
+        self.use_copy = use_copy
+        self.upload_dir = upload_dir
+        self.status = "queued"
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.stats: Optional[dict] = None
+        self.error: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._elapsed: Optional[float] = None
+        self._estimates: dict[str, Optional[int]] = {}
+        self._rows: dict[str, int] = {}
+        self._finished_files: set[str] = set()
+        self._files: dict[str, dict] = {}
+
+    def source_files(self) -> list[str]:
+        if os.path.isdir(self.path):
+            return [
+                os.path.join(self.path, filename)
+                for filename in sorted(os.listdir(self.path))
+                if filename.endswith('.csv')
+            ]
+        return [self.path]
+
+    def start(self):
+        estimates = {
+            os.path.basename(filepath): count_source_rows(filepath)
+            for filepath in self.source_files()
+        }
+        with self._lock:
+            self._estimates = estimates
+            self.status = "running"
+            self.started_at = datetime.utcnow()
+            self._started = time.perf_counter()
+
+    def record_progress(self, filename: str, rows: int, file_stats: dict, finished: bool):
+        with self._lock:
+            self._rows[filename] = self._rows.get(filename, 0) + rows
+            self._files[filename] = file_stats
+            if finished:
+                self._finished_files.add(filename)
+
+    def finish(self, stats: dict):
+        with self._lock:
+            self.stats = stats
+            self.status = "completed"
+            self._stop()
+
+    def fail(self, error: str):
+        with self._lock:
+            self.error = error
+            self.status = "failed"
+            self._stop()
+
+    def _stop(self):
+        self.finished_at = datetime.utcnow()
+        self._elapsed = time.perf_counter() - self._started if self._started else 0.0
+
+    def _percent_done(self) -> Optional[float]:
+        if self.status == "completed":
+            return 100.0
+        if not self._estimates or None in self._estimates.values():
+            return None
+        total = sum(self._estimates.values())
+        if not total:
+            return None
+        done = sum(
+            estimate if filename in self._finished_files else min(self._rows.get(filename, 0), estimate)
+            for filename, estimate in self._estimates.items()
+        )
+        return round(done / total * 100, 2)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            processed = sum(self._rows.values())
+            if self._elapsed is not None:
+                elapsed = self._elapsed
+            else:
+                elapsed = time.perf_counter() - self._started if self._started else 0.0
+            estimates = [e for e in self._estimates.values() if e is not None]
+            return {
+                "id": self.id,
+                "source": self.source,
+                "path": self.name,
+                "status": self.status,
+                "force": self.force,
+                "use_copy": self.use_copy,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "total_rows": sum(estimates) if estimates else None,
+                "processed_rows": processed,
+                "rows_per_second": round(processed / elapsed, 1) if elapsed else 0.0,
+                "percent_done": self._percent_done(),
+                "files": dict(self._files),
+                "stats": self.stats,
+                "error": self.error,
+            }
+
+
+class ImportJobManager:
+    """Runs imports on a background thread, one at a time, off the request thread."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import-job")
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, ImportJob] = OrderedDict()
+
+    def resolve_server_path(self, source: str, path: str) -> str:
+        """Absolute path for a server-side source, which must lie inside IMPORT_DATA_DIR."""
+        root = os.path.realpath(IMPORT_DATA_DIR)
+        resolved = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, resolved]) != root:
+            raise ValueError(f"Path must be inside {IMPORT_DATA_DIR}")
+        if source == "accupass" and not os.path.isdir(resolved):
+            raise ValueError("Accupass imports take a directory of CSV files")
+        if source == "portaly" and not (os.path.isfile(resolved) and resolved.endswith('.xlsx')):
+            raise ValueError("Portaly imports take an .xlsx file")
+        return resolved
+
+    def new_upload_dir(self) -> str:
+        upload_dir = os.path.join(IMPORT_UPLOAD_DIR, uuid.uuid4().hex)
+        os.makedirs(upload_dir)
+        return upload_dir
+
+    def submit(
+        self, source: str, path: str, force: bool = False, use_copy: bool = False,
+        upload_dir: Optional[str] = None, name: Optional[str] = None
+    ) -> ImportJob:
+        if source not in SOURCES:
+            raise ValueError(f"Unknown source: {source}")
+        if use_copy and engine.dialect.name != "postgresql":
+            raise ValueError("COPY mode requires PostgreSQL")
+
+        job = ImportJob(source, path, force, use_copy, upload_dir, name)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self) -> list[ImportJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ("completed", "failed")]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: ImportJob):
+        db = SessionLocal()
+        try:
+            job.start()
+            service = DataImportService(db, use_copy=job.use_copy, progress=job.record_progress)
+            # Uploads land in a fresh directory, so their manifest entries could never match again
+            use_manifest = job.upload_dir is None
+            if job.source == "accupass":
+                stats = service.import_accupass_data(job.path, force=job.force, use_manifest=use_manifest)
+            else:
+                stats = service.import_portaly_data(job.path, force=job.force, use_manifest=use_manifest)
+            job.finish(stats)
+        except Exception as e:
+            db.rollback()
+            job.fail(str(e))
+        finally:
+            db.close()
+            if job.upload_dir:
+                shutil.rmtree(job.upload_dir, ignore_errors=True)
+
+
+# Global instance
+import_job_manager = ImportJobManager()
@@ -0,0 +1,40 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Fallback for databases without advisory locks
+_local_locks: dict[str, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+
+def _lock_key(source: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock."""
+    digest = hashlib.sha256(f"crm_import:{source}".encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+@contextmanager
+def import_lock(db: Session, source: str):
+    """Serialize imports of one source across processes.
+
+    On Postgres this holds a session-level advisory lock on a dedicated
+    connection, so it survives the periodic commits of the import session.
+    Elsewhere only imports within this process are serialized.
+    """
+    engine = db.get_bind()
+    if engine.dialect.name != "postgresql":
+        with _local_locks_guard:
+            lock = _local_locks.setdefault(source, threading.Lock())
+        with lock:
+            yield
+        return
+
+    key = _lock_key(source)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
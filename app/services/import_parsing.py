@@ -0,0 +1,232 @@
+"""
+Parsing and normalization of Accupass / Portaly source files.
+
+These helpers never touch the database, so DataImportService can run them
+in worker processes.
+"""
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import islice
+from typing import Iterator, Optional
+import pandas as pd
+from openpyxl import load_workbook
+
+
+# Formats tried, in order, for source datetime columns
+DATETIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y/%m/%d %H:%M:%S']
+
+# Examples kept per column when reporting unparseable values
+MAX_REPORTED_EXAMPLES = 5
+
+
+class UnparseableValues:
+    """Source values that matched no known format, collected per column and reported in bulk."""
+
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self.examples: dict[str, list[str]] = {}
+
+    def add(self, column_name: str, values: pd.Series):
+        if values.empty:
+            return
+        self.counts[column_name] = self.counts.get(column_name, 0) + len(values)
+        examples = self.examples.setdefault(column_name, [])
+        examples.extend(values.iloc[:MAX_REPORTED_EXAMPLES - len(examples)].astype(str))
+
+    def as_dict(self) -> dict:
+        return {
+            column_name: {"count": count, "examples": self.examples[column_name]}
+            for column_name, count in self.counts.items()
+        }
+
+
+@dataclass
+class ParsedEventFile:
+    """One Accupass CSV, normalized and ready to be written."""
+    filename: str
+    event_name: str
+    event_date: Optional[date]
+    rows: pd.DataFrame
+    unparseable: dict
+
+
+def parse_filename(filename: str) -> tuple[str, Optional[date]]:
+    """Extract event name and date from filename."""
+    # Remove .csv extension
+    name = filename.replace('.csv', '')
+
+    # Try to extract date (YYYYMMDD pattern)
+    date_match = re.match(r'^(\d{8})\s*(.+)$', name)
+    if date_match:
+        date_str = date_match.group(1)
+        event_name = date_match.group(2).strip()
+        # Clean up event name
+        event_name = re.sub(r'^參加名單\s*-?\s*', '', event_name).strip()
+        try:
+            event_date = datetime.strptime(date_str, '%Y%m%d').date()
+            return event_name, event_date
+        except ValueError:
+            pass
+
+    return name, None
+
+
+def parse_datetime_column(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Parse a whole column, trying each of DATETIME_FORMATS on the rows still unparsed.
+
+    Returns the parsed column (NaT where missing or unparseable) and the raw
+    values that were present but matched no format.
+    """
+    text = values.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    pending = text.notna() & (text != "") & (text != "nan")
+
+    for fmt in DATETIME_FORMATS:
+        if not pending.any():
+            break
+        attempt = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+        matched = attempt[attempt.notna()]
+        parsed[matched.index] = matched
+        pending[matched.index] = False
+
+    return parsed, values[pending]
+
+
+def column(df: pd.DataFrame, *names: str) -> pd.Series:
+    """First of the named columns present in df, or an all-missing column."""
+    for name in names:
+        if name in df.columns:
+            return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def clean_text_column(values: pd.Series) -> pd.Series:
+    """Strip whitespace; empty and 'nan' become None."""
+    text = values.astype("string").str.strip()
+    text = text.mask(text.isin(["", "nan"]))
+    return text.astype(object).where(text.notna(), None)
+
+
+def clean_email_column(values: pd.Series) -> pd.Series:
+    return clean_text_column(values.astype("string").str.lower())
+
+
+def clean_phone_column(values: pd.Series) -> pd.Series:
+    """Strip phones, dropping the .0 left by float conversion; empty and 'nan' become None."""
+    # Remove .0 from float conversion
+    phones = values.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    return clean_text_column(phones)
+
+
+def read_accupass_csv(filepath: str, unparseable: Optional[UnparseableValues] = None) -> pd.DataFrame:
+    """Read an Accupass CSV into normalized columns, one row per attendee email."""
+    # Read CSV (skip first row which contains indices)
+    raw = pd.read_csv(filepath, skiprows=1, dtype=str)
+    registration_time, rejected = parse_datetime_column(column(raw, '報名時間(GTM+8)'))
+    if unparseable is not None:
+        unparseable.add("registration_time", rejected)
+
+    df = pd.DataFrame({
+        "email": clean_email_column(column(raw, '參加人Email')),
+        "name": clean_text_column(column(raw, '參加人姓名')),
+        "phone": clean_phone_column(column(raw, '參加人電話')),
+        "industry": clean_text_column(column(raw, '產業')),
+        "job_title": clean_text_column(column(raw, '職稱 & 工作內容', '職稱')),
+        "age_range": clean_text_column(column(raw, '年齡')),
+        "order_no": clean_text_column(column(raw, '訂單編號')),
+        "ticket_type": clean_text_column(column(raw, '票券名稱')),
+        "registration_time": registration_time,
+        "checked_in": pd.to_numeric(column(raw, '驗票次數'), errors='coerce').fillna(0) != 0,
+    })
+
+    df = df[df["email"].notna()]
+    return df.drop_duplicates("email", keep="first")
+
+
+def parse_accupass_file(filepath: str) -> ParsedEventFile:
+    """Parse one Accupass CSV. Runs in worker processes."""
+    filename = os.path.basename(filepath)
+    event_name, event_date = parse_filename(filename)
+    unparseable = UnparseableValues()
+    rows = read_accupass_csv(filepath, unparseable)
+    return ParsedEventFile(
+        filename=filename,
+        event_name=event_name,
+        event_date=event_date,
+        rows=rows,
+        unparseable=unparseable.as_dict(),
+    )
+
+
+def _unique_headers(headers) -> list[str]:
+    """Header names as pandas would give them: blanks named, duplicates suffixed .1, .2, ..."""
+    seen: dict[str, int] = {}
+    unique = []
+    for i, header in enumerate(headers):
+        name = f"Unnamed: {i}" if header is None else str(header)
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        unique.append(name if count == 0 else f"{name}.{count}")
+    return unique
+
+
+def normalize_portaly_rows(raw: pd.DataFrame, unparseable: Optional[UnparseableValues] = None) -> pd.DataFrame:
+    """Normalize raw Portaly columns, one row per transaction."""
+    product_name = column(raw, '專案')
+    purchased_at, rejected = parse_datetime_column(column(raw, '交易時間'))
+    if unparseable is not None:
+        unparseable.add("purchased_at", rejected)
+    return pd.DataFrame({
+        "email": clean_email_column(column(raw, 'E-mail')),
+        "name": clean_text_column(column(raw, '姓名.1', '姓名')),
+        "phone": clean_phone_column(column(raw, '電話')),
+        "job_title": clean_text_column(column(raw, '職業')),
+        "paid": column(raw, '交易狀態') == '已入帳',
+        "product_name": product_name.where(product_name.notna(), None),
+        "order_no": clean_text_column(column(raw, '訂單編號')),
+        "amount": pd.to_numeric(column(raw, '交易金額'), errors='coerce').fillna(0),
+        "payment_method": clean_text_column(column(raw, '付款方式')),
+        "purchased_at": purchased_at,
+    })
+
+
+def iter_portaly_chunks(
+    filepath: str, chunk_size: int, unparseable: Optional[UnparseableValues] = None
+) -> Iterator[pd.DataFrame]:
+    """Stream a Portaly export as normalized chunks of at most chunk_size rows.
+
+    The workbook is opened in openpyxl read-only mode, so memory use depends
+    on chunk_size rather than on the size of the file.
+    """
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = _unique_headers(next(rows, ()))
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            yield normalize_portaly_rows(pd.DataFrame(batch, columns=headers, dtype=object), unparseable)
+    finally:
+        workbook.close()
+
+
+def count_source_rows(filepath: str) -> Optional[int]:
+    """Approximate number of data rows in a source file, without parsing it."""
+    if filepath.endswith('.csv'):
+        with open(filepath, 'rb') as f:
+            lines = sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+        # Index row and header row
+        return max(lines - 2, 0)
+
+    if filepath.endswith('.xlsx'):
+        workbook = load_workbook(filepath, read_only=True)
+        try:
+            max_row = workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+        return max(max_row - 1, 0) if max_row else None
+
+    return None
@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import tuple_
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Encode a (created_at, id) sort key as an opaque cursor string."""
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(row_id)})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), UUID(payload["i"])
+    except (KeyError, TypeError, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def apply_keyset(query, created_at_col, id_col, cursor: Optional[str], descending: bool = False):
+    """Order a query by (created_at, id) and, if a cursor is given, start after it."""
+    if descending:
+        query = query.order_by(created_at_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_at_col, id_col)
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        key = tuple_(created_at_col, id_col)
+        if descending:
+            query = query.filter(key < tuple_(created_at, row_id))
+        else:
+            query = query.filter(key > tuple_(created_at, row_id))
+
+    return query
+
+
+def next_cursor(rows: list, limit: int, created_at_of, id_of) -> Optional[str]:
+    """Cursor pointing after the last row, or None when this is the last page."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(created_at_of(last), id_of(last))
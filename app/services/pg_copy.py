@@ -0,0 +1,75 @@
+"""
+Streaming COPY into Postgres temporary staging tables.
+
+DataImportService uses this in COPY mode: normalized rows are streamed into a
+staging table with psycopg2's copy_expert, then merged into the real tables
+with set-based SQL.
+"""
+import csv
+import io
+from typing import Iterable, Sequence
+from sqlalchemy import MetaData, Table
+from sqlalchemy.orm import Session
+
+# Characters of CSV handed to COPY per read()
+COPY_BUFFER_SIZE = 1 << 16
+
+# Staging tables are never created by init_db
+staging_metadata = MetaData()
+
+
+def staging_table(name: str, *columns) -> Table:
+    """A temporary table, private to the connection and dropped at commit."""
+    return Table(
+        name, staging_metadata, *columns,
+        prefixes=["TEMPORARY"], postgresql_on_commit="DROP",
+    )
+
+
+class CsvRowStream(io.TextIOBase):
+    """File-like object that renders rows as CSV on demand.
+
+    copy_expert pulls from it in chunks, so the full CSV text is never held
+    in memory. None is written as an unquoted empty field, which COPY reads
+    as NULL.
+    """
+
+    def __init__(self, rows: Iterable[Sequence]):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            size = COPY_BUFFER_SIZE
+        while len(self._pending) + self._buffer.tell() < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+        self._pending += self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def reset_staging_table(db: Session, table: Table):
+    """Create the staging table if this transaction doesn't have it yet, and empty it."""
+    connection = db.connection()
+    table.create(connection, checkfirst=True)
+    connection.execute(table.delete())
+
+
+def copy_rows(db: Session, table: Table, rows: Iterable[Sequence]):
+    """Stream rows (in table column order) into table with COPY on the session's connection."""
+    columns = ", ".join(column.name for column in table.columns)
+    sql = f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    raw_connection = db.connection().connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(sql, CsvRowStream(rows), size=COPY_BUFFER_SIZE)
@@ -27,6 +27,16 @@ class SchedulerService:
             replace_existing=True,
         )
 
+        # 接手中斷的發送中活動（啟動時立即檢查一次）
+        self.scheduler.add_job(
+            self._resume_interrupted_campaigns,
+            trigger=IntervalTrigger(minutes=1),
+            id="resume_interrupted_campaigns",
+            name="接手中斷的發送",
+            replace_existing=True,
+            next_run_time=datetime.now(),
+        )
+
         self.scheduler.start()
         self._started = True
         print("排程器已啟動")
@@ -65,6 +75,21 @@ class SchedulerService:
         finally:
             db.close()
 
+    def _resume_interrupted_campaigns(self):
+        """從待發送佇列繼續發送中斷的活動"""
+        db: Session = SessionLocal()
+        try:
+            results = EmailService(db).resume_interrupted_campaigns()
+            for campaign_id, result in results.items():
+                if result["success"]:
+                    print(f"活動 {campaign_id} 續傳完成: {result['sent_count']} 成功, {result['failed_count']} 失敗")
+                else:
+                    print(f"活動 {campaign_id} 續傳失敗: {result.get('error', '未知錯誤')}")
+        except Exception as e:
+            print(f"續傳檢查錯誤: {e}")
+        finally:
+            db.close()
+
     def get_scheduled_jobs(self):
         """取得所有排程任務"""
         return [
@@ -0,0 +1,34 @@
+from sqlalchemy import Table, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def insert_ignoring_conflicts(db: Session, table: Table, index_elements: list[str]):
+    """INSERT ... ON CONFLICT (index_elements) DO NOTHING for the session's dialect.
+
+    Add .returning() to learn which rows were actually inserted.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    raise NotImplementedError(f"ON CONFLICT is not supported for {dialect}")
+
+
+def insert_updating_conflicts(db: Session, table: Table, index_elements: list[str], update_columns: list[str]):
+    """INSERT ... ON CONFLICT (index_elements) DO UPDATE for the session's dialect.
+
+    On conflict, each of update_columns is set to the value proposed for insertion.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table)
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported for {dialect}")
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: stmt.excluded[column] for column in update_columns},
+    )
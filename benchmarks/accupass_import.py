@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Time DataImportService.import_accupass_data on a synthetic Accupass export.
+
+    DATABASE_URL=sqlite:////tmp/crm_bench.db python benchmarks/accupass_import.py --rows 100000
+
+Compare the INSERT path with COPY mode on fresh Postgres databases:
+
+    DATABASE_URL=postgresql://localhost/crm_bench_orm python benchmarks/accupass_import.py --events 20
+    DATABASE_URL=postgresql://localhost/crm_bench_copy python benchmarks/accupass_import.py --events 20 --copy
+
+Never point this at a production database: it imports synthetic customers.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import write_accupass_dir
+from app.database import SessionLocal, init_db
+from app.services.data_import import DataImportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="registrations per event file")
+    parser.add_argument("--events", type=int, default=1)
+    parser.add_argument("--customers", type=int, default=None, help="customer pool size (default: rows)")
+    parser.add_argument("--workers", type=int, default=None, help="parse processes (default: CPU count)")
+    parser.add_argument("--copy", action="store_true", help="use COPY mode (PostgreSQL only)")
+    args = parser.parse_args()
+
+    init_db()
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_accupass_dir(data_dir, args.events, args.rows, args.customers or args.rows)
+
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            stats = DataImportService(db, use_copy=args.copy).import_accupass_data(data_dir, workers=args.workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+
+    total_rows = args.rows * args.events
+    print(f"Imported {total_rows} rows in {elapsed:.2f}s ({total_rows / elapsed:,.0f} rows/s)")
+    print(f"  {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark customer search: legacy ilike scan vs. the indexed search subsystem.
+
+Seeds synthetic customers into a dedicated database, then times the legacy
+`ilike('%term%')` query, CustomerSearchService.search and typeahead.
+
+    DATABASE_URL=postgresql://localhost/crm_bench python benchmarks/customer_search.py --customers 1000000
+
+Never point this at a production database: it inserts synthetic customers.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, or_
+from app.database import SessionLocal, init_db
+from app.models import Customer
+from app.services.customer_search import CustomerSearchService, customer_search_index
+
+FIRST_NAMES = ["王", "李", "張", "劉", "陳", "楊", "黃", "趙", "吳", "周", "Alice", "Brian", "Chloe", "David"]
+GIVEN_NAMES = ["小明", "美玲", "志豪", "淑芬", "建宏", "雅婷", "Chen", "Lin", "Wu", "Huang"]
+DOMAINS = ["gmail.com", "yahoo.com.tw", "hotmail.com", "example.com"]
+
+
+def seed_customers(db, count: int, batch_size: int = 10000):
+    """Insert synthetic customers until the table holds `count` rows."""
+    existing = db.query(func.count(Customer.id)).scalar()
+    now = datetime.utcnow()
+    rng = random.Random(42)
+
+    for start in range(existing, count, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, count)):
+            name = rng.choice(FIRST_NAMES) + rng.choice(GIVEN_NAMES)
+            rows.append({
+                "id": uuid.uuid4(),
+                "email": f"user{i}.{rng.randint(0, 9999)}@{rng.choice(DOMAINS)}",
+                "name": name,
+                "created_at": now,
+                "updated_at": now,
+            })
+        db.execute(insert(Customer), rows)
+        db.commit()
+        print(f"  seeded {min(start + batch_size, count)}/{count}", end="\r")
+    print()
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        print(f"Seeding {args.customers} customers...")
+        seed_customers(db, args.customers)
+
+        service = CustomerSearchService(db)
+        if not service.is_postgres:
+            start = time.perf_counter()
+            customer_search_index.load(db)
+            print(f"In-process index built in {time.perf_counter() - start:.2f}s")
+
+        terms = ["user12345", "美玲", "chen", "yahoo"]
+        for term in terms:
+            pattern = f"%{term}%"
+
+            def legacy():
+                db.query(Customer).filter(
+                    or_(Customer.name.ilike(pattern), Customer.email.ilike(pattern))
+                ).limit(20).all()
+                db.query(func.count(Customer.id)).filter(
+                    or_(Customer.name.ilike(pattern), Customer.email.ilike(pattern))
+                ).scalar()
+
+            def indexed():
+                service.search(term, 20)
+                db.query(func.count(Customer.id)).filter(service.search_filter(term)).scalar()
+
+            print(f"\nterm={term!r}")
+            print(f"  legacy ilike  : {timed(legacy, args.repeat)}")
+            print(f"  indexed search: {timed(indexed, args.repeat)}")
+            print(f"  typeahead     : {timed(lambda: service.typeahead(term[:3], 10), args.repeat)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Synthetic Accupass / Portaly source files for import benchmarks.
+"""
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+
+SURNAMES = ["王", "李", "張", "劉", "陳", "楊", "黃", "趙", "吳", "周", "林", "徐"]
+GIVEN_NAMES = ["小明", "美玲", "志豪", "淑芬", "建宏", "雅婷", "冠宇", "怡君", "家豪", "佩珊"]
+DOMAINS = ["gmail.com", "yahoo.com.tw", "hotmail.com", "example.com"]
+INDUSTRIES = ["科技業", "金融業", "製造業", "教育", "服務業", "醫療", None]
+JOB_TITLES = ["工程師", "產品經理", "行銷", "業務", "設計師", "學生", None]
+AGE_RANGES = ["18-24", "25-34", "35-44", "45-54", None]
+TICKET_TYPES = ["早鳥票", "一般票", "VIP 票"]
+PRODUCTS = [(f"線上課程 {i:02d}", 1200 + 300 * (i % 10)) for i in range(20)]
+PAYMENT_METHODS = ["信用卡", "ATM 轉帳", "LINE Pay", "超商代碼"]
+# Mostly paid; the importer skips the rest
+PAYMENT_STATUSES = ["已入帳"] * 9 + ["未付款"]
+
+ACCUPASS_COLUMNS = [
+    "訂單編號", "票券名稱", "報名時間(GTM+8)", "參加人姓名", "參加人Email",
+    "參加人電話", "產業", "職稱 & 工作內容", "年齡", "驗票次數",
+]
+
+# Portaly repeats 姓名 (buyer, then recipient); pandas reads the second as 姓名.1
+PORTALY_COLUMNS = [
+    "訂單編號", "專案", "交易金額", "交易狀態", "交易時間", "付款方式",
+    "姓名", "E-mail", "電話", "姓名", "職業",
+]
+
+
+def customer_email(index: int) -> str:
+    """Deterministic email for synthetic customer `index` (shared across sources)."""
+    return f"member{index:07d}@{DOMAINS[index % len(DOMAINS)]}"
+
+
+def _customer_name(rng: random.Random) -> str:
+    return rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES)
+
+
+def _phone(rng: random.Random):
+    # Exports store phones as floats when the column is numeric
+    return f"9{rng.randint(10000000, 99999999)}.0" if rng.random() < 0.9 else ""
+
+
+def accupass_filename(event_index: int, start: datetime = datetime(2022, 1, 1)) -> str:
+    event_date = start + timedelta(days=7 * event_index)
+    return f"{event_date:%Y%m%d} 參加名單-合成活動 {event_index:04d}.csv"
+
+
+def write_accupass_csv(path: str, rows: int, customer_pool: int, seed: int = 0,
+                       event_time: datetime = datetime(2022, 1, 1)) -> str:
+    """Write an Accupass attendee export with `rows` registrations.
+
+    The first line is the column-index row that DataImportService skips.
+    Attendees are drawn from `customer_pool` synthetic customers.
+    """
+    rng = random.Random(seed)
+    attendees = rng.sample(range(customer_pool), min(rows, customer_pool))
+    while len(attendees) < rows:
+        attendees.append(rng.randrange(customer_pool))
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(range(len(ACCUPASS_COLUMNS)))
+        writer.writerow(ACCUPASS_COLUMNS)
+        for i, customer in enumerate(attendees):
+            registered = event_time - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+            time_format = rng.choice(["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y/%m/%d %H:%M:%S"])
+            writer.writerow([
+                f"AP{seed:04d}{i:07d}",
+                rng.choice(TICKET_TYPES),
+                registered.strftime(time_format),
+                _customer_name(rng),
+                customer_email(customer).upper() if rng.random() < 0.05 else customer_email(customer),
+                _phone(rng),
+                rng.choice(INDUSTRIES) or "",
+                rng.choice(JOB_TITLES) or "",
+                rng.choice(AGE_RANGES) or "",
+                rng.choice([0, 0, 1]),
+            ])
+    return path
+
+
+def write_accupass_dir(directory: str, events: int, rows_per_event: int, customer_pool: int) -> str:
+    """Write `events` Accupass CSVs into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    for event_index in range(events):
+        write_accupass_csv(
+            os.path.join(directory, accupass_filename(event_index)),
+            rows_per_event,
+            customer_pool,
+            seed=event_index,
+            event_time=datetime(2022, 1, 1) + timedelta(days=7 * event_index),
+        )
+    return directory
+
+
+def write_portaly_xlsx(path: str, rows: int, customer_pool: int, seed: int = 0,
+                       start: datetime = datetime(2022, 1, 1)) -> str:
+    """Write a Portaly transaction export with `rows` orders.
+
+    Uses openpyxl's write-only mode so multi-million-row files can be
+    generated in constant memory. Buyers are drawn from `customer_pool`,
+    overlapping with the Accupass attendees.
+    """
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(PORTALY_COLUMNS)
+    for i in range(rows):
+        customer = rng.randrange(customer_pool)
+        product, price = rng.choice(PRODUCTS)
+        name = _customer_name(rng)
+        phone = _phone(rng)
+        sheet.append([
+            f"PT{seed:04d}{i:08d}",
+            product,
+            price,
+            rng.choice(PAYMENT_STATUSES),
+            start + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 3)),
+            rng.choice(PAYMENT_METHODS),
+            name,
+            customer_email(customer),
+            float(phone) if phone else None,
+            name,
+            rng.choice(JOB_TITLES),
+        ])
+    workbook.save(path)
+    return path
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-send client overhead in GmailService.
+
+Compares the legacy pattern (build() the Gmail client for every message)
+with GmailService's cached client and per-thread authorized connection.
+Both sides prepare a messages.send request and stop before any network
+traffic, so the numbers are pure client-side overhead; the TLS handshake
+that the cached connection also saves on a real send is not included.
+
+    python benchmarks/gmail_client.py --sends 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from app.services.gmail_service import GmailService, PreparedEmail, _build_raw_message
+
+EMAIL = PreparedEmail(
+    to_email="someone@example.com",
+    subject="Benchmark",
+    html_content="<html><body><p>Hello</p></body></html>",
+    text_content="Hello",
+)
+
+
+def legacy_send(credentials: Credentials, raw_message: str):
+    service = build("gmail", "v1", credentials=credentials)
+    return service.users().messages().send(userId="me", body={"raw": raw_message})
+
+
+def cached_send(gmail: GmailService, raw_message: str):
+    client = gmail._client()
+    return client.messages.send(userId="me", body={"raw": raw_message})
+
+
+def timed(fn, sends: int) -> dict:
+    samples = []
+    for _ in range(sends):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[int(len(samples) * 0.95)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sends", type=int, default=200, help="requests prepared per variant")
+    args = parser.parse_args()
+
+    # A token with no expiry counts as valid; nothing is sent
+    credentials = Credentials(token="benchmark-token")
+    gmail = GmailService()
+    gmail._set_credentials(credentials)
+    raw_message = _build_raw_message(EMAIL)
+
+    results = {
+        "build() per send": timed(lambda: legacy_send(credentials, raw_message), args.sends),
+        "cached client": timed(lambda: cached_send(gmail, raw_message), args.sends),
+    }
+
+    print(f"{'variant':<18} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, r in results.items():
+        print(f"{name:<18} {r['mean_ms']:>9.3f} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f}")
+    speedup = results["build() per send"]["mean_ms"] / results["cached client"]["mean_ms"]
+    print(f"\nPer-send overhead reduced {speedup:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+End-to-end import benchmark: generate synthetic Accupass CSVs and a Portaly
+workbook, import them with DataImportService, and report rows/s, SQL
+statements issued and peak RSS per phase.
+
+    # Embedded stand-in (a throwaway SQLite file)
+    python benchmarks/import_suite.py --events 20 --rows 5000 --portaly-rows 100000 --output results.json
+
+    # Local Postgres; use a dedicated, empty database
+    python benchmarks/import_suite.py --database-url postgresql://localhost/crm_bench --copy
+
+Phases: accupass (first import), portaly (first import) and rerun (both
+sources again, which the import manifest should skip). Compare the JSON
+files written with --output between releases.
+
+Statements are counted at the DB-API cursor, so an executemany batch counts
+once and COPY streams are not counted.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def peak_rss_mb() -> dict:
+    """Peak resident set size so far, for this process and its (parse worker) children."""
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def run_phase(name: str, rows: int, counter: StatementCounter, fn) -> dict:
+    statements_before = counter.count
+    start = time.perf_counter()
+    stats = fn()
+    elapsed = time.perf_counter() - start
+    result = {
+        "phase": name,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if rows and elapsed else None,
+        "statements": counter.count - statements_before,
+        "peak_rss_mb": peak_rss_mb(),
+        "stats": stats,
+    }
+    print(
+        f"  {name:<9} {rows:>9} rows  {elapsed:8.2f}s  {result['rows_per_second'] or 0:>10,.0f} rows/s  "
+        f"{result['statements']:>7} statements  peak RSS {result['peak_rss_mb']['self']} MB"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="target database (default: $DATABASE_URL, else a temporary SQLite file)")
+    parser.add_argument("--events", type=int, default=10, help="Accupass event files")
+    parser.add_argument("--rows", type=int, default=5000, help="registrations per event file")
+    parser.add_argument("--portaly-rows", type=int, default=50000, help="orders in the Portaly workbook")
+    parser.add_argument("--customers", type=int, default=None,
+                        help="synthetic customer pool shared by both sources (default: rows * events / 2)")
+    parser.add_argument("--workers", type=int, default=None, help="Accupass parse processes (default: CPU count)")
+    parser.add_argument("--copy", action="store_true", help="use COPY mode (PostgreSQL only)")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = args.database_url or os.environ.get("DATABASE_URL")
+        if not database_url:
+            database_url = f"sqlite:///{os.path.join(workdir, 'crm_bench.db')}"
+        # app.config reads DATABASE_URL at import time
+        os.environ["DATABASE_URL"] = database_url
+
+        from benchmarks.generators import write_accupass_dir, write_portaly_xlsx
+        from app.database import SessionLocal, engine, init_db
+        from app.services.data_import import DataImportService
+
+        customers = args.customers or max(args.rows * args.events // 2, 1)
+        accupass_dir = os.path.join(workdir, "accupass")
+        portaly_file = os.path.join(workdir, "portaly.xlsx")
+
+        print(f"Generating {args.events} x {args.rows} Accupass rows and {args.portaly_rows} Portaly rows...")
+        start = time.perf_counter()
+        write_accupass_dir(accupass_dir, args.events, args.rows, customers)
+        write_portaly_xlsx(portaly_file, args.portaly_rows, customers)
+        print(f"  generated in {time.perf_counter() - start:.1f}s")
+
+        init_db()
+        counter = StatementCounter(engine)
+        accupass_rows = args.events * args.rows
+        print(f"Importing into {engine.dialect.name}:")
+
+        db = SessionLocal()
+        try:
+            service = DataImportService(db, use_copy=args.copy)
+            phases = [
+                run_phase("accupass", accupass_rows, counter,
+                          lambda: service.import_accupass_data(accupass_dir, workers=args.workers)),
+                run_phase("portaly", args.portaly_rows, counter,
+                          lambda: service.import_portaly_data(portaly_file)),
+                # Nothing should be written; only the time to decide that matters
+                run_phase("rerun", 0, counter, lambda: {
+                    "accupass": service.import_accupass_data(accupass_dir, workers=args.workers),
+                    "portaly": service.import_portaly_data(portaly_file),
+                }),
+            ]
+        finally:
+            db.close()
+
+    results = {
+        "benchmark": "import_suite",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": engine.dialect.name,
+        "parameters": {
+            "events": args.events,
+            "rows_per_event": args.rows,
+            "portaly_rows": args.portaly_rows,
+            "customers": customers,
+            "workers": args.workers,
+            "copy": args.copy,
+        },
+        "phases": phases,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Remove duplicate registrations and purchases imported before the unique
+indexes existed, then create those indexes.
+
+The earliest row of each duplicate group is kept.
+"""
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, delete, exists, or_, text
+from app.database import SessionLocal, init_db
+from app.models import EventRegistration, Purchase
+from app.services.cache import bump_data_generation
+from app.services.customer_stats import CustomerStatsService
+
+
+def delete_later_duplicates(db, table, *key_columns) -> int:
+    """Delete rows for which an earlier row (by created_at, then id) has the same key."""
+    earlier = table.alias("earlier")
+    is_earlier = or_(
+        earlier.c.created_at < table.c.created_at,
+        and_(earlier.c.created_at == table.c.created_at, earlier.c.id < table.c.id),
+    )
+    same_key = [earlier.c[column] == table.c[column] for column in key_columns]
+    result = db.execute(delete(table).where(exists().where(*same_key, is_earlier)))
+    return result.rowcount
+
+
+def main():
+    db = SessionLocal()
+
+    try:
+        print("Removing duplicate rows...")
+        registrations = delete_later_duplicates(
+            db, EventRegistration.__table__, "event_id", "customer_id"
+        )
+        purchases = delete_later_duplicates(db, Purchase.__table__, "order_no")
+        print(f"  Duplicate registrations removed: {registrations}")
+        print(f"  Duplicate purchases removed: {purchases}")
+
+        # Superseded by uq_event_registrations_event_customer
+        db.execute(text("DROP INDEX IF EXISTS ix_event_registrations_event_customer"))
+
+        if registrations or purchases:
+            print("Rebuilding customer stats...")
+            CustomerStatsService(db).rebuild()
+            bump_data_generation(db)
+        db.commit()
+    except Exception as e:
+        print(f"\nError during dedupe: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print("Creating unique indexes...")
+    init_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,14 @@
 Data import script for CRM system.
 Imports data from Accupass CSV files and Portaly Excel file.
 """
+import argparse
 import sys
 import os
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal, init_db
 from app.services.data_import import DataImportService
 
 # Data paths
@@ -17,29 +18,53 @@ ACCUPASS_DIR = "my_data/accupass"
 PORTALY_FILE = "my_data/portaly/傳送門商品管理-202512231819.xlsx"
 
 
+def print_unparseable(filename: str, columns: dict):
+    for column, report in columns.items():
+        print(f"  Unparseable {column} in {filename}: {report['count']} (e.g. {', '.join(report['examples'])})")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Import Accupass and Portaly data.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes used to parse Accupass files (default: CPU count)")
+    parser.add_argument("--copy", action="store_true",
+                        help="Bulk load with Postgres COPY into staging tables (PostgreSQL only)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-import files even if the import manifest says they are unchanged")
+    args = parser.parse_args()
+
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    init_db()
 
     print("\nStarting data import...")
     db = SessionLocal()
 
     try:
-        import_service = DataImportService(db)
+        import_service = DataImportService(db, use_copy=args.copy)
 
         # Import Accupass data
         print(f"\nImporting Accupass data from: {ACCUPASS_DIR}")
-        accupass_stats = import_service.import_accupass_data(ACCUPASS_DIR)
+        accupass_stats = import_service.import_accupass_data(
+            ACCUPASS_DIR, workers=args.workers, force=args.force
+        )
         print(f"  Events imported: {accupass_stats['events']}")
         print(f"  Registrations imported: {accupass_stats['registrations']}")
         print(f"  New customers created: {accupass_stats['customers_created']}")
+        print(f"  Unchanged files skipped: {accupass_stats['skipped_files']}")
+        for filename, error in accupass_stats["failed_files"]:
+            print(f"  Failed: {filename}: {error}")
+        for filename, columns in accupass_stats["unparseable_values"].items():
+            print_unparseable(filename, columns)
 
         # Import Portaly data
         print(f"\nImporting Portaly data from: {PORTALY_FILE}")
-        portaly_stats = import_service.import_portaly_data(PORTALY_FILE)
+        portaly_stats = import_service.import_portaly_data(PORTALY_FILE, force=args.force)
         print(f"  Products imported: {portaly_stats['products']}")
         print(f"  Purchases imported: {portaly_stats['purchases']}")
         print(f"  New customers created: {portaly_stats['customers_created']}")
+        if portaly_stats["skipped_files"]:
+            print("  Unchanged since last import, skipped")
+        print_unparseable(os.path.basename(PORTALY_FILE), portaly_stats["unparseable_values"])
 
         print("\n" + "=" * 50)
         print("Data import completed successfully!")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Rebuild the customer_stats activity summary from raw registrations and purchases.
+"""
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, init_db
+from app.services.cache import bump_data_generation
+from app.services.customer_stats import CustomerStatsService
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+
+    try:
+        print("Rebuilding customer stats...")
+        count = CustomerStatsService(db).rebuild()
+        bump_data_generation(db)
+        db.commit()
+        print(f"  Customers summarized: {count}")
+    except Exception as e:
+        print(f"\nError during rebuild: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
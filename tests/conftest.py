@@ -0,0 +1,35 @@
+import os
+
+# app.config reads DATABASE_URL on import; point the app at an in-memory SQLite DB
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import pytest
+from sqlalchemy import event
+
+from app.database import Base, SessionLocal, engine, init_db
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to the database while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield executed
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
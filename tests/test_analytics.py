@@ -0,0 +1,66 @@
+import pytest
+
+from app.models import Customer, Event, EventRegistration, Product, Purchase
+from app.services.analytics import AnalyticsService, analytics_cache
+from app.services.cache import bump_data_generation
+
+
+@pytest.fixture(autouse=True)
+def clear_analytics_cache():
+    analytics_cache.clear()
+    yield
+    analytics_cache.clear()
+
+
+@pytest.fixture
+def crm_data(db):
+    alice = Customer(email="alice@example.com", name="Alice")
+    bob = Customer(email="bob@example.com", name="Bob")
+    event = Event(name="Launch")
+    product = Product(name="Course")
+    db.add_all([alice, bob, event, product])
+    db.flush()
+    db.add_all([
+        EventRegistration(event_id=event.id, customer_id=alice.id),
+        EventRegistration(event_id=event.id, customer_id=bob.id),
+        Purchase(order_no="A-1", customer_id=alice.id, product_id=product.id, amount=100),
+    ])
+    db.commit()
+
+
+def test_overview_stats_cold_call_is_one_query(db, crm_data, statements):
+    stats = AnalyticsService(db).get_overview_stats()
+
+    assert len(statements) == 2
+    generation_lookup, overview = statements
+    assert "data_generations" in generation_lookup
+    assert "customers" in overview and "purchases" in overview
+    assert stats.total_customers == 2
+    assert stats.total_events == 1
+    assert stats.total_event_registrations == 2
+    assert stats.total_purchases == 1
+    assert stats.total_revenue == 100
+    assert stats.customers_with_purchases == 1
+    assert stats.customers_with_events_only == 1
+    assert stats.conversion_rate == 50
+
+
+def test_overview_stats_cached_call_only_checks_generation(db, crm_data, statements):
+    service = AnalyticsService(db)
+    first = service.get_overview_stats()
+    statements.clear()
+
+    assert service.get_overview_stats() == first
+    assert len(statements) == 1
+    assert "data_generations" in statements[0]
+
+
+def test_overview_stats_recomputed_after_generation_bump(db, crm_data, statements):
+    service = AnalyticsService(db)
+    service.get_overview_stats()
+    bump_data_generation(db)
+    db.commit()
+    statements.clear()
+
+    service.get_overview_stats()
+    assert len(statements) == 2
@@ -0,0 +1,72 @@
+import pytest
+
+from app.database import SessionLocal
+from app.models import Customer
+from app.services.cache import bump_data_generation, get_data_generation
+from app.services.customer_search import CustomerSearchService, customer_search_index
+from app.services.data_import import DataImportService
+
+ACCUPASS_HEADER = (
+    "0,1,2,3,4,5,6,7,8,9\n"
+    "訂單編號,票券名稱,報名時間(GTM+8),參加人姓名,參加人Email,參加人電話,產業,職稱,年齡,驗票次數\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_search_index():
+    customer_search_index.clear()
+    yield
+    customer_search_index.clear()
+
+
+def emails(results):
+    return sorted(customer.email for customer, _ in results)
+
+
+def write_event_file(directory, filename, attendees):
+    rows = "".join(
+        f"A{i},一般票,2024-03-01 10:00:00,{name},{email},,,,,1\n"
+        for i, (name, email) in enumerate(attendees)
+    )
+    (directory / filename).write_text(ACCUPASS_HEADER + rows, encoding="utf-8")
+
+
+def test_index_reloads_after_another_writer_bumps_the_generation(db):
+    db.add(Customer(email="alice@example.com", name="Alice"))
+    db.commit()
+    service = CustomerSearchService(db)
+    assert emails(service.search("example")) == ["alice@example.com"]
+
+    # e.g. scripts/import_data.py running in another process
+    other = SessionLocal()
+    other.add(Customer(email="bob@example.com", name="Bob"))
+    bump_data_generation(other)
+    other.commit()
+    other.close()
+
+    assert emails(service.search("example")) == ["alice@example.com", "bob@example.com"]
+    assert customer_search_index.generation == get_data_generation(db)
+
+
+def test_import_adds_only_committed_customers(db, tmp_path, monkeypatch):
+    write_event_file(tmp_path, "20240301 參加名單-好活動.csv", [("Carol", "carol@example.com")])
+    write_event_file(tmp_path, "20240302 參加名單-壞活動.csv", [("Dave", "dave@example.com")])
+    service = CustomerSearchService(db)
+    assert service.search("example") == []
+
+    import_single_event = DataImportService._import_single_event
+
+    def fail_after_writing(self, parsed):
+        stats = import_single_event(self, parsed)
+        if "壞活動" in parsed.filename:
+            raise RuntimeError("boom")
+        return stats
+
+    monkeypatch.setattr(DataImportService, "_import_single_event", fail_after_writing)
+    stats = DataImportService(db).import_accupass_data(str(tmp_path), workers=1)
+
+    assert [name for name, _ in stats["failed_files"]] == ["20240302 參加名單-壞活動.csv"]
+    # The import's own commit kept the index current: no reload, no phantom Dave
+    assert customer_search_index.generation == get_data_generation(db)
+    monkeypatch.setattr(customer_search_index, "load", lambda db: pytest.fail("index reloaded"))
+    assert emails(service.search("example")) == ["carol@example.com"]
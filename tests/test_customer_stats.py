@@ -0,0 +1,28 @@
+from app.models import Customer, CustomerStats, Product, Purchase
+from app.services.customer_stats import CustomerStatsService
+
+
+def test_refresh_updates_existing_rows_in_place(db, statements):
+    alice = Customer(email="alice@example.com", name="Alice")
+    product = Product(name="Course")
+    db.add_all([alice, product])
+    db.flush()
+    service = CustomerStatsService(db)
+    service.refresh([alice.id])
+    db.commit()
+    assert db.get(CustomerStats, alice.id).has_purchased is False
+
+    db.add(Purchase(order_no="A-1", customer_id=alice.id, product_id=product.id, amount=100))
+    db.flush()
+    statements.clear()
+    service.refresh([alice.id, alice.id])
+    db.commit()
+
+    db.expire_all()
+    stats = db.get(CustomerStats, alice.id)
+    assert stats.has_purchased is True
+    assert stats.purchase_count == 1
+    assert stats.total_spent == 100
+    # A single upsert: no DELETE for a concurrent import to race against
+    assert not any(s.startswith("DELETE") for s in statements)
+    assert sum("ON CONFLICT" in s for s in statements) == 1
@@ -0,0 +1,22 @@
+import pytest
+from sqlalchemy import text
+
+from app.database import init_db
+from app.models import Customer, Product, Purchase
+
+
+def test_init_db_refuses_to_start_with_duplicate_imports(db):
+    customer = Customer(email="alice@example.com", name="Alice")
+    product = Product(name="Course")
+    db.add_all([customer, product])
+    db.flush()
+    # Rows imported before the unique index existed
+    db.execute(text("DROP INDEX uq_purchases_order_no"))
+    db.add_all([
+        Purchase(order_no="A-1", customer_id=customer.id, product_id=product.id),
+        Purchase(order_no="A-1", customer_id=customer.id, product_id=product.id),
+    ])
+    db.commit()
+
+    with pytest.raises(RuntimeError, match="uq_purchases_order_no.*scripts/dedupe_imports.py"):
+        init_db()
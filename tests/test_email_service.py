@@ -0,0 +1,47 @@
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import Customer
+from app.models.email_campaign import EmailCampaign, RecipientFilter
+from app.services.campaign_sender import Recipient
+from app.services.email_service import EmailService
+
+
+def test_recipients_are_streamed_as_projected_records(db):
+    db.add_all([Customer(email=f"c{i}@example.com", name=f"C{i}") for i in range(3)])
+    db.commit()
+
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, context.execution_options))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        recipients = list(EmailService(db).get_recipients_by_filter(RecipientFilter.ALL))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert all(isinstance(r, Recipient) for r in recipients)
+    assert sorted(r.email for r in recipients) == [f"c{i}@example.com" for i in range(3)]
+    (statement, options), = executed
+    assert options.get("stream_results")
+    select_list = statement.split("FROM")[0]
+    assert select_list.count("customers.") == 3
+    assert all(f"customers.{column}" in select_list for column in ("id", "email", "name"))
+
+
+def test_manual_campaign_recipients_follow_recipient_ids(db):
+    customers = [Customer(email=f"c{i}@example.com", name=f"C{i}") for i in range(3)]
+    db.add_all(customers)
+    db.commit()
+    service = EmailService(db)
+    campaign = service.create_campaign(
+        name="manual", subject="Hi", content_html="<p>Hi</p>",
+        recipient_mode="manual", recipient_ids=[str(customers[0].id), str(customers[2].id)],
+    )
+
+    streamed = {r.id for r in service.get_campaign_recipients(campaign)}
+    by_ids = {r.id for r in service.get_recipients_by_ids([str(c.id) for c in customers[:1]])}
+    assert streamed == {customers[0].id, customers[2].id}
+    assert by_ids == {customers[0].id}